@@ -12,8 +12,11 @@ from flaskage.scaffold import Scaffold
 from flaskage.utils import camelcase, AliasedGroup, MODULE_NAME
 from flaskage.helpers import (
     valid_project_directory, ColoredFormatter, PROJECT_NAME, MODEL_COLUMN,
-    COLUMN_TYPE_MAPPING, COLUMN_FACTORY_MAPPING, COLUMN_MODIFIER_MAPPING,
-    COLUMN_MODIFIER_PRIMARY_KEY
+    COLUMN_TYPE_MAPPING, COLUMN_FACTORY_MAPPING,
+    COLUMN_FACTORY_UNIQUE_MAPPING, COLUMN_MODIFIER_MAPPING,
+    COLUMN_MODIFIER_PRIMARY_KEY, COLUMN_TYPE_REFERENCES,
+    REFERENCE_LOADER_STRATEGIES, REFERENCE_LOADER_STRATEGY_DEFAULT,
+    DATABASE_ENGINES, DATABASE_ENGINE_DEFAULT
 )
 
 
@@ -70,9 +73,15 @@ def cli(color):
 @cli.command(add_help_option=False)
 @click.help_option('-h', '--help')
 @mode_option
+@click.option('-d', '--database', type=click.Choice(DATABASE_ENGINES),
+              default=DATABASE_ENGINE_DEFAULT,
+              help='Database used in production (default: %s)' %
+                   DATABASE_ENGINE_DEFAULT)
+@click.option('-r', '--read-replicas', 'replicas', is_flag=True,
+              help='Route reads to read replica databases')
 @click.argument('project_name', type=PROJECT_NAME)
 @click.pass_context
-def new(ctx, project_name, mode):
+def new(ctx, project_name, mode, database, replicas):
     """Create a new Flaskage project."""
     # Unpack the project directory and name
     name, directory = project_name
@@ -91,7 +100,10 @@ def new(ctx, project_name, mode):
     scaffold = Scaffold(
         source_root=os.path.join(TEMPLATE_DIR, 'project'),
         target_root=directory,
-        variables={'name': name, 'name_camelcase': name_camelcase},
+        variables={
+            'name': name, 'name_camelcase': name_camelcase,
+            'database': database, 'replicas': replicas
+        },
         ignored_dirs=IGNORED_DIRS, ignored_files=IGNORED_FILES,
         overwrite_target_root=True, existing_policy=mode
     )
@@ -154,12 +166,19 @@ def asset(ctx, name, mode):
 @generate.command(add_help_option=False)
 @click.help_option('-h', '--help')
 @mode_option
+@click.option('-c', '--cached', is_flag=True,
+              help='Cache the responses of the generated views')
+@click.option('--conditional', is_flag=True,
+              help='Answer conditional requests to the generated views')
+@click.option('-p', '--paginate', type=MODULE_NAME, metavar='MODEL',
+              help='List the given model a page at a time in the index view')
 @click.argument('name', type=MODULE_NAME)
 @click.pass_context
-def blueprint(ctx, name, mode):
+def blueprint(ctx, name, mode, cached, conditional, paginate):
     """Generate an application component (blueprint)."""
     # Convert the name to CamelCase for use with class names
     name_camelcase = camelcase(name)
+    paginate_camelcase = camelcase(paginate) if paginate else None
 
     # Generation of items can only run in a valid project directory
     if not valid_project_directory():
@@ -177,7 +196,11 @@ def blueprint(ctx, name, mode):
             os.path.join(TEMPLATE_DIR, 'blueprint'),
         ],
         target_root=os.getcwd(),
-        variables={'name': name, 'name_camelcase': name_camelcase},
+        variables={
+            'name': name, 'name_camelcase': name_camelcase, 'cached': cached,
+            'conditional': conditional, 'paginate': paginate,
+            'paginate_camelcase': paginate_camelcase
+        },
         ignored_dirs=IGNORED_DIRS, ignored_files=IGNORED_FILES,
         overwrite_target_root=True, existing_policy=mode
     )
@@ -279,6 +302,25 @@ def model(ctx, name, columns, mode):
 
     If no primary key is specified, a primary key integer column named id
     will be created for you.
+
+    A column may also reference another model using the format:
+
+    <name>:references:<model>[:<modifier>,<modifier>...]
+
+    e.g.
+
+    flaskage g model post author:references:user:required
+
+    This creates an indexed foreign key column named <name>_id, a
+    relationship named <name> and a SubFactory in the model's factory.  The
+    referenced model must have an integer primary key named id.  The
+    required and unique modifiers are available along with the loader
+    strategy used for the relationship:
+
+    \b
+    - joined (the default): loaded with the same query using a join
+    - subquery: loaded for all rows at once using a second query
+    - select: loaded with a query when first accessed
     """
     # Convert the name to CamelCase for use with class names
     name_camelcase = camelcase(name)
@@ -295,8 +337,63 @@ def model(ctx, name, columns, mode):
     primary_key_provided = False
     column_model_definitions = []
     column_factory_definitions = []
+    relationship_definitions = []
+    reference_factory_definitions = []
+    reference_factories = []
+
+    for column_name, type, length, reference, modifiers in columns:
+        if type == COLUMN_TYPE_REFERENCES:
+            reference_camelcase = camelcase(reference)
+
+            # Generate an indexed foreign key column
+            model_definition = (
+                "db.Integer, db.ForeignKey('%s.id')" % reference
+            )
+            for modifier in modifiers:
+                if modifier in COLUMN_MODIFIER_MAPPING:
+                    model_definition += (
+                        ', %s' % COLUMN_MODIFIER_MAPPING[modifier]
+                    )
+            model_definition += ', index=True'
+            column_model_definitions.append(
+                ('%s_id' % column_name, model_definition)
+            )
+
+            # Generate the relationship using the loader strategy chosen
+            loader = REFERENCE_LOADER_STRATEGY_DEFAULT
+            for modifier in modifiers:
+                if modifier in REFERENCE_LOADER_STRATEGIES:
+                    loader = modifier
+            relationship_definition = (
+                "'%s', foreign_keys=[%s_id], lazy='%s'" % (
+                    reference_camelcase, column_name, loader
+                )
+            )
+            if loader == 'joined' and 'required' in modifiers:
+                # A reference which is always present may use an inner join
+                relationship_definition += ', innerjoin=True'
+            if reference == name:
+                relationship_definition += ", remote_side='%s.id'" % (
+                    reference_camelcase
+                )
+            relationship_definitions.append(
+                (column_name, relationship_definition)
+            )
+
+            # A model referencing itself can't create its parent in its
+            # factory without doing so endlessly
+            if reference != name:
+                reference_factory_definitions.append(
+                    (column_name, reference_camelcase, 'unique' in modifiers)
+                )
+                if (reference, reference_camelcase) not in (
+                    reference_factories
+                ):
+                    reference_factories.append(
+                        (reference, reference_camelcase)
+                    )
+            continue
 
-    for column_name, type, length, modifiers in columns:
         # Generate the type and its size (if applicable)
         model_definition = 'db.%s' % COLUMN_TYPE_MAPPING[type]
         if length:
@@ -319,10 +416,20 @@ def model(ctx, name, columns, mode):
             elif '*' in COLUMN_FACTORY_MAPPING[type]:
                 factory_definition = COLUMN_FACTORY_MAPPING[type]['*']
 
+        # Unique columns use the factory's sequence number so that their
+        # values never collide
+        sequence = type in COLUMN_FACTORY_UNIQUE_MAPPING and (
+            'unique' in modifiers or COLUMN_MODIFIER_PRIMARY_KEY in modifiers
+        )
+        if factory_definition and sequence:
+            factory_definition = COLUMN_FACTORY_UNIQUE_MAPPING[type].format(
+                factory_definition
+            )
+
         # Add the factory column definition to our list
         if factory_definition:
             column_factory_definitions.append(
-                (column_name, factory_definition)
+                (column_name, factory_definition, sequence)
             )
 
     click.echo()
@@ -335,7 +442,10 @@ def model(ctx, name, columns, mode):
             'name': name, 'name_camelcase': name_camelcase,
             'column_model_definitions': column_model_definitions,
             'primary_key_provided': primary_key_provided,
-            'column_factory_definitions': column_factory_definitions
+            'column_factory_definitions': column_factory_definitions,
+            'relationship_definitions': relationship_definitions,
+            'reference_factory_definitions': reference_factory_definitions,
+            'reference_factories': reference_factories
         },
         ignored_dirs=IGNORED_DIRS, ignored_files=IGNORED_FILES,
         overwrite_target_root=True, existing_policy=mode
@@ -360,6 +470,43 @@ def model(ctx, name, columns, mode):
     click.echo()
 
 
+@generate.command(add_help_option=False)
+@click.help_option('-h', '--help')
+@mode_option
+@click.argument('name', type=MODULE_NAME)
+@click.pass_context
+def job(ctx, name, mode):
+    """Generate a background job."""
+    # Convert the name to CamelCase for use with class names
+    name_camelcase = camelcase(name)
+
+    # Generation of items can only run in a valid project directory
+    if not valid_project_directory():
+        ctx.fail(
+            'You can only run the generate command from a valid project '
+            'directory'
+        )
+
+    click.echo()
+    click.echo('Generating new job named %s:' % name)
+    click.echo()
+    scaffold = Scaffold(
+        source_root=os.path.join(TEMPLATE_DIR, 'job'),
+        target_root=os.getcwd(),
+        variables={'name': name, 'name_camelcase': name_camelcase},
+        ignored_dirs=IGNORED_DIRS, ignored_files=IGNORED_FILES,
+        overwrite_target_root=True, existing_policy=mode
+    )
+    scaffold.render_structure()
+    click.echo()
+    click.echo('Steps required to activate the new job:')
+    click.echo()
+    click.echo('  Add the job import to app/jobs/__init__.py')
+    click.echo()
+    click.echo('  from . import %s_job  # noqa' % name)
+    click.echo()
+
+
 @generate.command(add_help_option=False)
 @click.help_option('-h', '--help')
 @mode_option
@@ -123,6 +123,17 @@ COLUMN_FACTORY_MAPPING['string'].update({
     'domain': COLUMN_FACTORY_MAPPING['string']['domain_name']
 })
 
+# Fakers for unique columns, which are given the factory's sequence number (n)
+# so that their values never collide
+COLUMN_FACTORY_UNIQUE_MAPPING = {
+    'integer': 'n',
+    'decimal': 'n',
+    'float': 'n',
+    'string': "'%s%i' % ({0}, n)",
+    'text': "'%s%i' % ({0}, n)",
+    'binary': "'%s%i' % ({0}, n)"
+}
+
 COLUMN_MODIFIER_MAPPING = {
     'index': 'index=True',
     'primary': 'primary_key=True',
@@ -131,8 +142,18 @@ COLUMN_MODIFIER_MAPPING = {
 }
 COLUMN_MODIFIER_PRIMARY_KEY = 'primary'
 
+COLUMN_TYPE_REFERENCES = 'references'
+REFERENCE_MODIFIERS = ['required', 'unique']
+REFERENCE_LOADER_STRATEGIES = ['joined', 'subquery', 'select']
+REFERENCE_LOADER_STRATEGY_DEFAULT = 'joined'
+
+DATABASE_ENGINES = ['postgresql', 'mysql', 'sqlite']
+DATABASE_ENGINE_DEFAULT = 'sqlite'
 
-def valid_project_directory(directory=os.getcwd()):
+
+def valid_project_directory(directory=None):
+    if directory is None:
+        directory = os.getcwd()
     return (
         os.path.isdir(os.path.join(directory, 'app')) and
         os.path.isdir(os.path.join(directory, 'app', 'models')) and
@@ -222,6 +243,9 @@ class ModelColumnParamType(click.ParamType):
             type_properties = []
             type = COLUMN_TYPE_DEFAULT
 
+        if type == COLUMN_TYPE_REFERENCES:
+            return self.convert_reference(name, column_properties, ctx)
+
         if type not in COLUMN_TYPE_MAPPING:
             ctx.fail('The type specified for column %s is invalid' % name)
 
@@ -254,7 +278,43 @@ class ModelColumnParamType(click.ParamType):
                     (modifier, name)
                 )
 
-        return name, type, length, modifiers
+        return name, type, length, None, modifiers
+
+    def convert_reference(self, name, column_properties, ctx):
+        # Extract and validate the model referenced
+        try:
+            reference = column_properties[2]
+        except IndexError:
+            reference = None
+        if not reference or not valid_underscore_name(reference):
+            ctx.fail(
+                'The model referenced by column %s is not a valid model '
+                'name' % name
+            )
+
+        # Extract and validate the column modifiers and loader strategy
+        try:
+            modifiers = column_properties[3].lower().split(',')
+        except IndexError:
+            modifiers = []
+
+        for modifier in modifiers:
+            if (
+                modifier not in REFERENCE_MODIFIERS and
+                modifier not in REFERENCE_LOADER_STRATEGIES
+            ):
+                ctx.fail(
+                    'The column modifier %s for column %s is invalid' %
+                    (modifier, name)
+                )
+
+        if len(set(modifiers) & set(REFERENCE_LOADER_STRATEGIES)) > 1:
+            ctx.fail(
+                'Only one loader strategy may be specified for column %s' %
+                name
+            )
+
+        return name, COLUMN_TYPE_REFERENCES, None, reference, modifiers
 
     def __repr__(self):
         return 'MODEL_COLUMN'
@@ -1,16 +1,24 @@
 # -*- coding: utf-8 -*-
-from app import create_app, db
+from test import (
+    begin_transaction, create_application, drop_database, end_transaction
+)
 
 
-def before_feature(context, feature):
-    context.app = create_app('test')
+def before_all(context):
+    context.app = create_application()
     context.client = context.app.test_client()
+
+
+def before_scenario(context, scenario):
     context.ctx = context.app.test_request_context()
     context.ctx.push()
-    db.create_all()
+    context.connection, context.transaction = begin_transaction()
 
 
-def after_feature(context, feature):
-    db.session.remove()
-    db.drop_all()
+def after_scenario(context, scenario):
+    end_transaction(context.connection, context.transaction)
     context.ctx.pop()
+
+
+def after_all(context):
+    drop_database()
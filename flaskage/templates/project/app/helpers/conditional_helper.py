@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+from functools import wraps
+
+from flask import current_app, make_response, render_template, request
+from werkzeug.http import is_resource_modified
+
+
+def conditional(f):
+    """
+    Add an ETag computed over the response body of a view so that requests
+    with a matching If-None-Match header receive an empty 304 response.
+    """
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        response = make_response(f(*args, **kwargs))
+        if (
+            request.method in ('GET', 'HEAD') and
+            response.status_code == 200 and
+            not response.direct_passthrough
+        ):
+            response.add_etag()
+            response.make_conditional(request)
+        return response
+    return decorated_function
+
+
+def render_conditional(template_name, etag=None, last_modified=None,
+                       **context):
+    """
+    Render a template unless the client already holds the current version
+    according to the given ETag or last modification time (e.g. the latest
+    updated_at of the models displayed), in which case a 304 response is
+    returned without rendering the template at all.  Only GET and HEAD
+    requests are conditional.
+    """
+    if request.method in ('GET', 'HEAD') and not is_resource_modified(
+        request.environ, etag=etag, last_modified=last_modified
+    ):
+        response = current_app.response_class(status=304)
+    else:
+        response = make_response(render_template(template_name, **context))
+        if etag is None:
+            response.add_etag()
+
+    if etag is not None:
+        response.set_etag(etag)
+    if last_modified is not None:
+        response.last_modified = last_modified
+    return response.make_conditional(request)
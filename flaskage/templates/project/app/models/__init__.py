@@ -1,6 +1,165 @@
 # -*- coding: utf-8 -*-
+import base64
+import json
+from contextlib import contextmanager
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+
+from sqlalchemy import and_, bindparam, or_, text
+from sqlalchemy.util import int_types, string_types
+
 from .. import db
 
+# The default number of rows sent to the database in each executemany call
+# made by the bulk operations below
+BULK_CHUNK_SIZE = 1000
+
+# Dialects which support INSERT ... ON CONFLICT ... DO UPDATE
+UPSERT_DIALECTS = ['postgresql', 'sqlite']
+
+# The format of datetimes stored in pagination cursors
+CURSOR_DATETIME_FORMAT = '%Y-%m-%dT%H:%M:%S.%f'
+
+
+def chunked(iterable, chunk_size):
+    """Split an iterable into lists containing at most chunk_size items."""
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _encode_cursor_value(value):
+    if isinstance(value, datetime):
+        return {'datetime': value.strftime(CURSOR_DATETIME_FORMAT)}
+    if isinstance(value, date):
+        return {'date': value.strftime('%Y-%m-%d')}
+    if isinstance(value, Decimal):
+        return {'decimal': str(value)}
+    raise TypeError('%r can\'t be stored in a cursor' % value)
+
+
+def _decode_cursor_value(value):
+    if 'datetime' in value:
+        return datetime.strptime(value['datetime'], CURSOR_DATETIME_FORMAT)
+    if 'date' in value:
+        return datetime.strptime(value['date'], '%Y-%m-%d').date()
+    if 'decimal' in value:
+        decimal = Decimal(value['decimal'])
+        if not decimal.is_finite():
+            raise ValueError('%s is not a finite decimal' % decimal)
+        return decimal
+    return value
+
+
+def _valid_cursor_value(column, value):
+    """Determine whether a value decoded from a cursor suits a column."""
+    try:
+        python_type = column.type.python_type
+    except NotImplementedError:
+        return value is not None
+    if issubclass(python_type, string_types):
+        allowed_types = string_types
+    elif python_type is float:
+        allowed_types = (float,) + int_types
+    elif python_type in int_types:
+        allowed_types = int_types
+    else:
+        allowed_types = python_type
+    # Booleans are integers and datetimes are dates, so they're only allowed
+    # where they're expected
+    return (
+        isinstance(value, allowed_types) and
+        isinstance(value, bool) == (python_type is bool) and
+        isinstance(value, datetime) == (python_type is datetime)
+    )
+
+
+def encode_cursor(values):
+    """Encode a list of column values as an opaque, URL safe cursor."""
+    data = json.dumps(
+        values, default=_encode_cursor_value, separators=(',', ':')
+    )
+    cursor = base64.urlsafe_b64encode(data.encode('utf-8')).rstrip(b'=')
+    return cursor.decode('ascii')
+
+
+def decode_cursor(cursor):
+    """
+    Decode a cursor created by encode_cursor, raising a ValueError if it's
+    invalid.
+    """
+    try:
+        data = base64.urlsafe_b64decode(
+            str(cursor) + '=' * (-len(cursor) % 4)
+        )
+        values = json.loads(
+            data.decode('utf-8'), object_hook=_decode_cursor_value
+        )
+    except (TypeError, ValueError, UnicodeError, InvalidOperation):
+        raise ValueError('Invalid cursor %r' % cursor)
+    if not isinstance(values, list):
+        raise ValueError('Invalid cursor %r' % cursor)
+    return values
+
+
+def in_unit_of_work():
+    """Determine whether commits are currently being deferred."""
+    return db.session.info.get('unit_of_work_depth', 0) > 0
+
+
+def begin_unit_of_work():
+    """Start deferring commits made through the CRUDMixin."""
+    db.session.info['unit_of_work_depth'] = (
+        db.session.info.get('unit_of_work_depth', 0) + 1
+    )
+
+
+def end_unit_of_work(commit=True):
+    """
+    Stop deferring commits, committing (or rolling back) the session once the
+    outermost unit of work has ended.  A nested unit of work which doesn't
+    commit causes the outermost one to roll back too, as its changes are
+    already part of the session.
+    """
+    info = db.session.info
+    depth = max(info.get('unit_of_work_depth', 0) - 1, 0)
+    info['unit_of_work_depth'] = depth
+    if not commit:
+        info['unit_of_work_rollback_only'] = True
+    if depth == 0:
+        if info.pop('unit_of_work_rollback_only', False):
+            db.session.rollback()
+        else:
+            db.session.commit()
+
+
+@contextmanager
+def unit_of_work():
+    """
+    Group all changes made within the block into a single transaction which
+    is committed on exit or rolled back if an exception is raised.  When
+    nested, an exception rolls back the outermost unit of work, even if it's
+    caught.
+    """
+    begin_unit_of_work()
+    try:
+        yield db.session
+    except Exception:
+        end_unit_of_work(commit=False)
+        raise
+    end_unit_of_work()
+
+
+def commit_session():
+    """Commit the session unless a unit of work is deferring commits."""
+    if not in_unit_of_work():
+        db.session.commit()
+
 
 class CRUDMixin(object):
     __table_args__ = {'extend_existing': True}
@@ -10,6 +169,171 @@ class CRUDMixin(object):
         instance = cls(**kwargs)
         return instance.save()
 
+    @classmethod
+    def bulk_create(cls, rows, chunk_size=BULK_CHUNK_SIZE, commit=True):
+        """Insert a sequence of dicts (keyed by column) using executemany."""
+        table = cls.__table__
+        for chunk in chunked(rows, chunk_size):
+            db.session.execute(table.insert(), chunk)
+        if commit:
+            commit_session()
+
+    @classmethod
+    def bulk_update(cls, rows, chunk_size=BULK_CHUNK_SIZE, commit=True):
+        """
+        Update a sequence of dicts (keyed by column) using executemany.  Each
+        dict must contain the primary key of the row it updates.
+        """
+        table = cls.__table__
+        primary_keys = [c.key for c in table.primary_key.columns]
+        for chunk in chunked(rows, chunk_size):
+            # Rows updating the same set of columns share a single statement
+            groups = {}
+            for row in chunk:
+                columns = tuple(
+                    sorted(k for k in row if k not in primary_keys)
+                )
+                groups.setdefault(columns, []).append(
+                    dict(('b_%s' % k, v) for k, v in row.items())
+                )
+            for columns, params in groups.items():
+                if not columns:
+                    continue
+                statement = table.update().values(
+                    dict((c, bindparam('b_%s' % c)) for c in columns)
+                )
+                for key in primary_keys:
+                    statement = statement.where(
+                        table.c[key] == bindparam('b_%s' % key)
+                    )
+                db.session.execute(statement, params)
+        if commit:
+            commit_session()
+
+    @classmethod
+    def bulk_delete(cls, ids, chunk_size=BULK_CHUNK_SIZE, commit=True):
+        """Delete rows by primary key using one DELETE ... IN per chunk."""
+        primary_key = cls._single_primary_key('bulk_delete')
+        table = cls.__table__
+        for chunk in chunked(ids, chunk_size):
+            db.session.execute(table.delete().where(primary_key.in_(chunk)))
+        if commit:
+            commit_session()
+
+    @classmethod
+    def bulk_upsert(cls, rows, index_elements=None, chunk_size=BULK_CHUNK_SIZE,
+                    commit=True):
+        """
+        Insert a sequence of dicts (keyed by column), updating rows which
+        conflict on index_elements (the primary key by default) instead.
+        This relies on ON CONFLICT which is available on PostgreSQL 9.5+ and
+        SQLite 3.24+.
+        """
+        table = cls.__table__
+        dialect = db.session.get_bind(cls.__mapper__).dialect
+        if dialect.name not in UPSERT_DIALECTS:
+            raise NotImplementedError(
+                'bulk_upsert is not supported on %s databases' % dialect.name
+            )
+        if index_elements is None:
+            index_elements = [c.key for c in table.primary_key.columns]
+
+        quote = dialect.identifier_preparer.quote
+        for chunk in chunked(rows, chunk_size):
+            # Rows with the same set of columns share a single statement
+            groups = {}
+            for row in chunk:
+                groups.setdefault(tuple(sorted(row)), []).append(row)
+            for columns, params in groups.items():
+                updates = [c for c in columns if c not in index_elements]
+                if updates:
+                    action = 'DO UPDATE SET %s' % ', '.join(
+                        '%s = excluded.%s' % (quote(c), quote(c))
+                        for c in updates
+                    )
+                else:
+                    action = 'DO NOTHING'
+                statement = text(
+                    'INSERT INTO %s (%s) VALUES (%s) ON CONFLICT (%s) %s' % (
+                        dialect.identifier_preparer.format_table(table),
+                        ', '.join(quote(c) for c in columns),
+                        ', '.join(':%s' % c for c in columns),
+                        ', '.join(quote(c) for c in index_elements),
+                        action
+                    )
+                )
+                db.session.execute(statement, params)
+        if commit:
+            commit_session()
+
+    @classmethod
+    def paginate_after(cls, cursor=None, limit=20, order_by=None,
+                       descending=False, query=None):
+        """
+        Return a page of up to limit rows following the cursor given (or the
+        first page when cursor is None) along with the cursor of the next
+        page (or None on the last page).
+
+        Rows are ordered by the order_by column (which must not be nullable)
+        and then the primary key, and each page seeks past the last row of
+        the previous one rather than skipping rows using OFFSET, so every
+        page is as fast as the first when there's an index on those columns.
+        A query may be given to filter the rows (but not to order them).  A
+        ValueError is raised if the cursor is invalid or limit is less than 1.
+        """
+        if limit < 1:
+            raise ValueError('The limit must be at least 1 (not %r)' % limit)
+        primary_key = getattr(
+            cls, cls._single_primary_key('paginate_after').key
+        )
+        columns = [primary_key]
+        if order_by is not None and order_by.key != primary_key.key:
+            columns.insert(0, order_by)
+        if query is None:
+            query = cls.query
+
+        if cursor is not None:
+            values = decode_cursor(cursor)
+            if len(values) != len(columns) or not all(
+                _valid_cursor_value(column, value)
+                for column, value in zip(columns, values)
+            ):
+                raise ValueError('Invalid cursor %r' % cursor)
+            # (a, b) > (x, y) is written as a > x OR (a = x AND b > y) as row
+            # value comparisons aren't supported by all databases
+            conditions = []
+            for index, column in enumerate(columns):
+                conditions.append(and_(*[
+                    previous_column == value for previous_column, value
+                    in zip(columns[:index], values[:index])
+                ] + [
+                    column < values[index] if descending
+                    else column > values[index]
+                ]))
+            query = query.filter(or_(*conditions))
+
+        # One more row than needed determines whether there's another page
+        items = query.order_by(*[
+            column.desc() if descending else column.asc()
+            for column in columns
+        ]).limit(limit + 1).all()
+        if len(items) <= limit:
+            return items, None
+        items = items[:limit]
+        return items, encode_cursor([
+            getattr(items[-1], column.key) for column in columns
+        ])
+
+    @classmethod
+    def _single_primary_key(cls, operation):
+        primary_keys = list(cls.__table__.primary_key.columns)
+        if len(primary_keys) != 1:
+            raise ValueError(
+                '%s requires a model with a single primary key column' %
+                operation
+            )
+        return primary_keys[0]
+
     def update(self, commit=True, **kwargs):
         for attr, value in kwargs.iteritems():
             setattr(self, attr, value)
@@ -18,12 +342,12 @@ class CRUDMixin(object):
     def save(self, commit=True):
         db.session.add(self)
         if commit:
-            db.session.commit()
+            commit_session()
         return self
 
     def delete(self, commit=True):
         db.session.delete(self)
-        return commit and db.session.commit()
+        return commit and commit_session()
 
 # Import models from the various model files
 # from .<submodule> import <model>  # noqa
@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+# Gunicorn settings used by ./manage.py serve, which may also be used directly
+# (e.g. gunicorn -c config/server.py wsgi:app)
+import multiprocessing
+import os
+
+_cpus = multiprocessing.cpu_count()
+
+bind = '0.0.0.0:%s' % os.environ.get('PORT', '8000')
+
+# Each worker process serves requests using a few threads so that requests
+# waiting on the database or other services overlap
+workers = int(os.environ.get('WEB_CONCURRENCY', _cpus * 2 + 1))
+threads = int(os.environ.get('WEB_THREADS', 4))
+
+# Async workers (./manage.py serve --async) serve many connections each using
+# gevent, which must be installed separately
+async_worker_class = 'gevent'
+async_workers = _cpus + 1
+worker_connections = 1000
+
+# Load the application once in the master process so that workers start
+# quickly and share memory
+preload_app = True
+
+# Restart workers after a (jittered) number of requests to contain memory
+# growth without restarting them all at once
+max_requests = 1000
+max_requests_jitter = 100
+
+# Timeouts (in seconds), with keep-alive connections suited to running behind
+# a load balancer
+timeout = 30
+graceful_timeout = 30
+keepalive = 5
+
+accesslog = '-'
@@ -0,0 +1,213 @@
+# -*- coding: utf-8 -*-
+import glob
+import gzip
+import hashlib
+import json
+import logging
+import os
+from multiprocessing import cpu_count
+from multiprocessing.pool import ThreadPool
+
+from flask import current_app
+from flask.ext.script import Manager
+from webassets.bundle import Bundle, get_all_bundle_files
+from webassets.ext.jinja2 import Jinja2Loader
+from webassets.script import CommandLineEnvironment
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+AssetsCommand = Manager(usage='Build and manage assets')
+
+# Stores the content hash and version of each bundle built so that unchanged
+# bundles may be skipped (relative to the assets directory)
+BUILD_CACHE = '.build-cache.json'
+
+
+def template_bundles(app):
+    """
+    Find the bundles defined using {% assets %} tags in the templates of the
+    app and its blueprints.
+    """
+    directories = [os.path.join(app.root_path, app.template_folder)]
+    for blueprint in app.blueprints.values():
+        if blueprint.template_folder is not None:
+            directories.append(
+                os.path.join(blueprint.root_path, blueprint.template_folder)
+            )
+    env = app.jinja_env.assets_environment
+    return Jinja2Loader(env, directories, [app.jinja_env]).load_bundles()
+
+
+def output_bundles(app):
+    """
+    Return each bundle with an output, found by expanding the registered
+    bundles and those defined in templates.  Containers (such as
+    {% assets "css_all" %} tags) simply refer to other bundles, so each
+    output is only returned once.
+    """
+    env = app.jinja_env.assets_environment
+    bundles = {}
+    for bundle in list(env) + template_bundles(app):
+        for child, extra_filters in bundle.iterbuild(env):
+            bundles.setdefault(child.output, child)
+    return list(bundles.values())
+
+
+def bundle_digest(bundle, env):
+    """
+    Hash the outputs and filters of a bundle (and its nested bundles) along
+    with the names and contents of all its source files.
+    """
+    md5 = hashlib.md5()
+    bundles = [bundle]
+    while bundles:
+        current = bundles.pop(0)
+        md5.update(repr((
+            current.output, [f.name for f in current.filters]
+        )).encode('utf-8'))
+        bundles.extend(c for c in current.contents if isinstance(c, Bundle))
+
+    for filename in get_all_bundle_files(bundle, env):
+        md5.update(filename.encode('utf-8'))
+        with open(filename, 'rb') as f:
+            md5.update(f.read())
+    return md5.hexdigest()
+
+
+def compress_file(filename):
+    """
+    Write a gzip compressed variant of a file alongside it (along with a
+    brotli compressed variant if the brotli package is installed) so that
+    lib.static may serve it without compressing it on each request.
+    """
+    with open(filename, 'rb') as f:
+        data = f.read()
+
+    with open(filename + '.gz', 'wb') as f:
+        gzip_file = gzip.GzipFile(
+            os.path.basename(filename), 'wb', 9, f,
+            mtime=os.path.getmtime(filename)
+        )
+        gzip_file.write(data)
+        gzip_file.close()
+
+    if brotli is not None:
+        with open(filename + '.br', 'wb') as f:
+            f.write(brotli.compress(data))
+
+
+def build_assets(app, manifest=None, jobs=None, force=False):
+    """
+    Build all registered bundles and those defined in templates for
+    production using a pool of jobs threads (the external filters run in
+    their own processes), recording the version of each output in the
+    manifest given (e.g. 'json:manifest.json') and compressing each output.
+    Bundles whose contents are unchanged since they were last built are
+    skipped unless force is set.
+    Returns a list of (bundle, built) tuples.
+    """
+    env = app.jinja_env.assets_environment
+    env.debug = False
+    if manifest:
+        env.manifest = manifest
+    manifest = env.manifest
+
+    cache_filename = os.path.join(env.directory, BUILD_CACHE)
+    cache = {}
+    if not force and os.path.exists(cache_filename):
+        with open(cache_filename) as f:
+            cache = json.load(f)
+
+    def build_bundle(bundle):
+        with app.app_context():
+            digest = bundle_digest(bundle, env)
+            cached_digest, version = cache.get(bundle.output, (None, None))
+            if cached_digest == digest and os.path.exists(
+                bundle.resolve_output(env, version=version)
+            ):
+                bundle.version = version
+                return bundle, digest, False
+            bundle.build(env=env, force=True)
+            compress_file(bundle.resolve_output(env, version=bundle.version))
+            return bundle, digest, True
+
+    # The manifest isn't thread-safe, so versions are recorded once all
+    # bundles have been built
+    env.manifest = None
+    pool = ThreadPool(jobs or cpu_count())
+    try:
+        results = pool.map(build_bundle, output_bundles(app), chunksize=1)
+    finally:
+        pool.close()
+        env.manifest = manifest
+
+    for bundle, digest, built in results:
+        cache[bundle.output] = (digest, bundle.version)
+        if manifest:
+            manifest.remember(bundle, env, bundle.version)
+    with open(cache_filename, 'w') as f:
+        json.dump(cache, f, indent=4, sort_keys=True)
+    return [(bundle, built) for bundle, digest, built in results]
+
+
+def clean_assets(app):
+    """
+    Remove every version of each bundle output (and its compressed variants)
+    along with the build cache and manifest, returning the filenames
+    removed.
+    """
+    env = app.jinja_env.assets_environment
+    filenames = [os.path.join(env.directory, BUILD_CACHE)]
+    if getattr(env.manifest, 'filename', None):
+        filenames.append(env.manifest.filename)
+    for bundle in output_bundles(app):
+        pattern = bundle.resolve_output(env, version='*')
+        for extension in ('', '.gz', '.br'):
+            filenames.extend(glob.glob(pattern + extension))
+
+    removed = []
+    for filename in filenames:
+        if os.path.exists(filename):
+            os.remove(filename)
+            removed.append(filename)
+    return removed
+
+
+@AssetsCommand.option('--manifest', dest='manifest', nargs='?',
+                      const='json:manifest.json',
+                      help='Write a manifest of built versions (defaults to '
+                           'json:manifest.json in the assets directory)')
+@AssetsCommand.option('-j', '--jobs', dest='jobs', type=int,
+                      help='The number of bundles to build concurrently '
+                           '(defaults to the number of CPUs)')
+@AssetsCommand.option('-f', '--force', dest='force', action='store_true',
+                      help='Rebuild bundles even if they are unchanged')
+def build(manifest=None, jobs=None, force=False):
+    """Build all bundles using fingerprinted output filenames"""
+    results = build_assets(
+        current_app._get_current_object(), manifest, jobs, force
+    )
+    built = len([bundle for bundle, built in results if built])
+    print('Built %i bundles (%i unchanged) into %s' % (
+        built, len(results) - built, current_app.config['ASSETS_DIRECTORY']
+    ))
+
+
+@AssetsCommand.command
+def watch():
+    """Rebuild bundles whenever their source files change"""
+    log = logging.getLogger('webassets')
+    log.addHandler(logging.StreamHandler())
+    log.setLevel(logging.DEBUG)
+    env = current_app.jinja_env.assets_environment
+    CommandLineEnvironment(env, log).watch()
+
+
+@AssetsCommand.command
+def clean():
+    """Remove all built bundles and the assets manifest"""
+    for filename in clean_assets(current_app):
+        print('Removed %s' % filename)
@@ -0,0 +1,201 @@
+# -*- coding: utf-8 -*-
+import time
+from functools import wraps
+from threading import Lock
+
+try:
+    from collections import OrderedDict
+except ImportError:
+    # Python 2.6
+    from ordereddict import OrderedDict
+
+from flask import current_app, make_response, request
+from jinja2 import Markup
+from werkzeug.urls import url_encode
+from werkzeug.utils import import_string
+
+
+class BaseCache(object):
+    """
+    The interface implemented by all cache backends.  A timeout of None uses
+    the default timeout while a timeout of 0 never expires.
+    """
+
+    # The number of lookups made through the Cache extension which found a
+    # value (or didn't), as reported by lib/metrics.py
+    hits = 0
+    misses = 0
+
+    def __init__(self, default_timeout=300, **kwargs):
+        self.default_timeout = default_timeout
+
+    def get(self, key):
+        return None
+
+    def set(self, key, value, timeout=None):
+        pass
+
+    def delete(self, key):
+        pass
+
+    def clear(self):
+        pass
+
+    def _expiry(self, timeout):
+        if timeout is None:
+            timeout = self.default_timeout
+        return time.time() + timeout if timeout else None
+
+
+class NullCache(BaseCache):
+    """A cache which never stores anything (useful for testing)."""
+
+
+class SimpleCache(BaseCache):
+    """
+    A thread-safe in-process cache which evicts the least recently used item
+    once it holds more than threshold items.  Each worker process maintains
+    its own cache.
+    """
+
+    def __init__(self, threshold=500, default_timeout=300, **kwargs):
+        super(SimpleCache, self).__init__(default_timeout)
+        self.threshold = threshold
+        self._items = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key):
+        with self._lock:
+            try:
+                expiry, value = self._items.pop(key)
+            except KeyError:
+                return None
+            if expiry is not None and expiry <= time.time():
+                return None
+            # Re-insert the item to mark it as the most recently used
+            self._items[key] = (expiry, value)
+            return value
+
+    def set(self, key, value, timeout=None):
+        with self._lock:
+            self._items.pop(key, None)
+            self._items[key] = (self._expiry(timeout), value)
+            while len(self._items) > self.threshold:
+                self._items.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._items.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+
+BACKENDS = {
+    'null': NullCache,
+    'simple': SimpleCache
+}
+
+
+class Cache(object):
+    """
+    Provides view and template fragment caching using the backend named in
+    CACHE_BACKEND.  This may be one of the built-in backends or the import
+    path of a BaseCache subclass (e.g. 'lib.redis_cache.RedisCache') which
+    will receive CACHE_OPTIONS as keyword arguments.
+    """
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('CACHE_BACKEND', 'simple')
+        app.config.setdefault('CACHE_DEFAULT_TIMEOUT', 300)
+        app.config.setdefault('CACHE_THRESHOLD', 500)
+        app.config.setdefault('CACHE_OPTIONS', {})
+
+        backend = app.config['CACHE_BACKEND']
+        if backend in BACKENDS:
+            backend_class = BACKENDS[backend]
+        else:
+            backend_class = import_string(backend)
+
+        options = dict(app.config['CACHE_OPTIONS'])
+        options.setdefault(
+            'default_timeout', app.config['CACHE_DEFAULT_TIMEOUT']
+        )
+        options.setdefault('threshold', app.config['CACHE_THRESHOLD'])
+
+        if not hasattr(app, 'extensions'):
+            app.extensions = {}
+        app.extensions['cache'] = backend_class(**options)
+        app.add_template_global(self.cached_fragment)
+
+    @property
+    def backend(self):
+        return current_app.extensions['cache']
+
+    def get(self, key):
+        backend = self.backend
+        value = backend.get(key)
+        if value is None:
+            backend.misses += 1
+        else:
+            backend.hits += 1
+        return value
+
+    def set(self, key, value, timeout=None):
+        self.backend.set(key, value, timeout)
+
+    def delete(self, key):
+        self.backend.delete(key)
+
+    def clear(self):
+        self.backend.clear()
+
+    def cached(self, timeout=None, key_prefix='view/%s'):
+        """
+        Cache successful responses of a view.  The cache key is made up of
+        the request path and its query string arguments.
+        """
+        def decorator(f):
+            @wraps(f)
+            def decorated_function(*args, **kwargs):
+                if request.method not in ('GET', 'HEAD'):
+                    return f(*args, **kwargs)
+
+                key = key_prefix % request.path
+                if request.args:
+                    key += '?' + url_encode(request.args, sort=True)
+
+                cached_response = self.get(key)
+                if cached_response is not None:
+                    return current_app.response_class(*cached_response)
+
+                response = make_response(f(*args, **kwargs))
+                if (
+                    response.status_code == 200 and
+                    not response.direct_passthrough
+                ):
+                    self.set(key, (
+                        response.get_data(), response.status_code,
+                        list(response.headers)
+                    ), timeout)
+                return response
+            return decorated_function
+        return decorator
+
+    def cached_fragment(self, name, timeout=None, caller=None):
+        """
+        Cache part of a template, for example:
+
+        {% call cached_fragment('sidebar', 60) %}...{% endcall %}
+        """
+        key = 'fragment/%s' % name
+        value = self.get(key)
+        if value is None:
+            value = caller()
+            self.set(key, value, timeout)
+        return Markup(value)
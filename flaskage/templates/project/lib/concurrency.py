@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import current_app
+from sqlalchemy.orm import Query
+
+
+class Concurrency(object):
+    """
+    Runs I/O bound calls (such as queries or requests to other services)
+    concurrently on a thread pool shared by all requests of a worker process,
+    which holds up to CONCURRENCY_MAX_WORKERS threads.
+    """
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('CONCURRENCY_MAX_WORKERS', 10)
+
+        if not hasattr(app, 'extensions'):
+            app.extensions = {}
+        # Threads are only started once calls are submitted, so the pool may
+        # safely be created before workers are forked
+        app.extensions['concurrency'] = ThreadPoolExecutor(
+            app.config['CONCURRENCY_MAX_WORKERS']
+        )
+
+    @property
+    def executor(self):
+        return current_app.extensions['concurrency']
+
+    def gather(self, *calls, **kwargs):
+        """
+        Run each of the callables given concurrently and return their results
+        in the same order, for example:
+
+        posts, tags = concurrency.gather(
+            lambda: Post.query.all(), lambda: Tag.query.all()
+        )
+
+        Each call runs within its own application context and database
+        session (which is removed once the call returns) but has no access to
+        the current request.  Queries must therefore be built within the
+        call, as a query built beforehand (e.g. Post.query.all) is bound to
+        the caller's session.  Objects returned are detached once the call's
+        session is removed, so calls should return plain data or objects with
+        everything needed already loaded (e.g. using joinedload) as lazy
+        loading them later fails.  The first exception raised by a call is
+        raised again here, and a timeout (in seconds) may be given for each
+        result.
+        """
+        timeout = kwargs.pop('timeout', None)
+        app = current_app._get_current_object()
+
+        for call in calls:
+            if isinstance(getattr(call, '__self__', None), Query):
+                raise TypeError(
+                    'Queries passed to gather must be built within a '
+                    'callable (e.g. lambda: Post.query.all())'
+                )
+
+        def run(call):
+            with app.app_context():
+                try:
+                    return call()
+                finally:
+                    sqlalchemy = app.extensions.get('sqlalchemy')
+                    if sqlalchemy is not None:
+                        sqlalchemy.db.session.remove()
+
+        futures = [self.executor.submit(run, call) for call in calls]
+        return [future.result(timeout) for future in futures]
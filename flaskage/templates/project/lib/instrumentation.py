@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+import time
+
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+class QueryStats(object):
+    """Query counts and timings collected while handling a single request."""
+
+    def __init__(self):
+        self.start_time = time.time()
+        self.count = 0
+        self.duration = 0.0
+        self.statements = {}
+
+    def record(self, statement, duration):
+        self.count += 1
+        self.duration += duration
+        self.statements[statement] = self.statements.get(statement, 0) + 1
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context,
+                           executemany):
+    conn.info.setdefault('query_start_time', []).append(time.time())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context,
+                          executemany):
+    start_times = conn.info.get('query_start_time')
+    if not start_times:
+        return
+    duration = time.time() - start_times.pop()
+
+    stats = getattr(g, 'query_stats', None) if has_request_context() else None
+    if stats is None:
+        return
+    stats.record(statement, duration)
+
+    if duration >= current_app.config['SLOW_QUERY_THRESHOLD']:
+        current_app.logger.warning(
+            'Slow query (%.1f ms) on %s %s: %s',
+            duration * 1000, request.method, request.path, statement
+        )
+
+
+class QueryInstrumentation(object):
+    """
+    Counts and times the queries issued during each request, logging slow
+    queries and repeated (N+1) statements and reporting the totals in a
+    Server-Timing response header.
+    """
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('QUERY_INSTRUMENTATION', True)
+        app.config.setdefault('SLOW_QUERY_THRESHOLD', 0.5)
+        app.config.setdefault('N_PLUS_ONE_THRESHOLD', 10)
+        app.config.setdefault('SERVER_TIMING_HEADER', True)
+
+        if not app.config['QUERY_INSTRUMENTATION']:
+            return
+
+        # The cursor events are shared by all engines and apps, so they are
+        # only registered once
+        if not event.contains(
+            Engine, 'before_cursor_execute', _before_cursor_execute
+        ):
+            event.listen(
+                Engine, 'before_cursor_execute', _before_cursor_execute
+            )
+            event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+
+        app.before_request(self.before_request)
+        app.after_request(self.after_request)
+
+    def before_request(self):
+        g.query_stats = QueryStats()
+
+    def after_request(self, response):
+        stats = getattr(g, 'query_stats', None)
+        if stats is None:
+            return response
+
+        threshold = current_app.config['N_PLUS_ONE_THRESHOLD']
+        for statement, count in stats.statements.items():
+            if count >= threshold:
+                current_app.logger.warning(
+                    'Possible N+1 query (executed %i times) on %s %s: %s',
+                    count, request.method, request.path, statement
+                )
+
+        if current_app.config['SERVER_TIMING_HEADER']:
+            response.headers.add(
+                'Server-Timing',
+                'db;dur=%.1f;desc="%i queries", app;dur=%.1f' % (
+                    stats.duration * 1000, stats.count,
+                    (time.time() - stats.start_time) * 1000
+                )
+            )
+        return response
@@ -0,0 +1,356 @@
+# -*- coding: utf-8 -*-
+import json
+import os
+import sqlite3
+import threading
+import time
+import traceback
+from contextlib import contextmanager
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import update_wrapper
+
+from flask import current_app
+from flask.ext.script import Command, Option
+from werkzeug.utils import import_string
+
+# The application used to run jobs in processes forked by the process backend
+_process_app = None
+_process_pid = None
+
+
+class Job(object):
+    """A registered job, which runs immediately when called."""
+
+    def __init__(self, queue, func, name):
+        self.queue = queue
+        self.func = func
+        self.name = name
+        update_wrapper(self, func)
+
+    def __call__(self, *args, **kwargs):
+        return self.func(*args, **kwargs)
+
+    def delay(self, *args, **kwargs):
+        """Queue the job to run in the background."""
+        return self.queue.enqueue(self.name, args, kwargs)
+
+
+class BaseBackend(object):
+    """
+    The interface implemented by all job queue backends, which runs up to
+    JOB_QUEUE_WORKERS jobs at once.
+    """
+
+    def __init__(self, queue, app):
+        self.queue = queue
+        self.app = app
+        self.workers = app.config['JOB_QUEUE_WORKERS']
+
+    def enqueue(self, name, args, kwargs):
+        raise NotImplementedError
+
+    def run(self, name, args, kwargs):
+        with self.app.app_context():
+            return self.queue.run(name, args, kwargs)
+
+
+class ImmediateBackend(BaseBackend):
+    """
+    Runs jobs as soon as they're queued within the current application
+    context (useful for testing), returning a completed future.
+    """
+
+    def enqueue(self, name, args, kwargs):
+        future = Future()
+        try:
+            future.set_result(self.queue.run(name, args, kwargs))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+
+class ThreadBackend(BaseBackend):
+    """
+    Runs jobs on a thread pool within the web process, returning a future
+    for each job.  Jobs which haven't run are lost if the process exits.
+    """
+
+    def __init__(self, queue, app):
+        super(ThreadBackend, self).__init__(queue, app)
+        self.executor = ThreadPoolExecutor(self.workers)
+
+    def enqueue(self, name, args, kwargs):
+        return self.executor.submit(self.run, name, args, kwargs)
+
+
+def _run_in_process(name, args, kwargs):
+    global _process_pid
+    # Database connections inherited from the parent process can't be
+    # shared, so each process starts with new ones
+    if _process_pid != os.getpid():
+        _process_pid = os.getpid()
+        sqlalchemy = _process_app.extensions.get('sqlalchemy')
+        if sqlalchemy is not None:
+            for connector in sqlalchemy.connectors.values():
+                connector.get_engine().dispose()
+    return _process_app.extensions['job_queue'].run(name, args, kwargs)
+
+
+class ProcessBackend(BaseBackend):
+    """
+    Runs CPU bound jobs on a pool of processes forked from the web process,
+    returning a future for each job.  Arguments and results must be
+    picklable.  Each web process creates its own pool when it first queues a
+    job.
+    """
+
+    def __init__(self, queue, app):
+        global _process_app
+        super(ProcessBackend, self).__init__(queue, app)
+        self.executor = None
+        self.executor_pid = None
+        self.lock = threading.Lock()
+        _process_app = app
+
+    def get_executor(self):
+        # A pool inherited from the process which forked this one (e.g. the
+        # gunicorn master when preload_app is set) can't be used here
+        with self.lock:
+            if self.executor_pid != os.getpid():
+                self.executor = ProcessPoolExecutor(self.workers)
+                self.executor_pid = os.getpid()
+            return self.executor
+
+    def enqueue(self, name, args, kwargs):
+        return self.get_executor().submit(
+            _run_in_process, name, args, kwargs
+        )
+
+
+class SQLiteBackend(BaseBackend):
+    """
+    Stores jobs in the SQLite database at JOB_QUEUE_DATABASE so that they
+    survive restarts, returning the id of each job.  Jobs are run by
+    ./manage.py worker and failed jobs are retried (with an increasing
+    delay) up to JOB_QUEUE_MAX_ATTEMPTS times.  Jobs still running after
+    JOB_QUEUE_VISIBILITY_TIMEOUT seconds are assumed to have been abandoned
+    by a worker which stopped and are run again.  Arguments must be JSON
+    serialisable.
+    """
+
+    def __init__(self, queue, app):
+        super(SQLiteBackend, self).__init__(queue, app)
+        self.database = app.config['JOB_QUEUE_DATABASE']
+        self.max_attempts = app.config['JOB_QUEUE_MAX_ATTEMPTS']
+        self.visibility_timeout = app.config['JOB_QUEUE_VISIBILITY_TIMEOUT']
+        with self.connect() as connection:
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS jobs ('
+                'id INTEGER PRIMARY KEY AUTOINCREMENT, '
+                'name TEXT NOT NULL, '
+                'arguments TEXT NOT NULL, '
+                "status TEXT NOT NULL DEFAULT 'queued', "
+                'attempts INTEGER NOT NULL DEFAULT 0, '
+                'error TEXT, '
+                'run_at REAL NOT NULL)'
+            )
+            connection.execute(
+                'CREATE INDEX IF NOT EXISTS jobs_status_run_at '
+                'ON jobs (status, run_at)'
+            )
+
+    @contextmanager
+    def connect(self):
+        connection = sqlite3.connect(self.database, timeout=30)
+        try:
+            with connection:
+                yield connection
+        finally:
+            connection.close()
+
+    def enqueue(self, name, args, kwargs):
+        with self.connect() as connection:
+            cursor = connection.execute(
+                'INSERT INTO jobs (name, arguments, run_at) VALUES (?, ?, ?)',
+                (name, json.dumps([args, kwargs]), time.time())
+            )
+            return cursor.lastrowid
+
+    def claim(self):
+        """
+        Mark the next job which is due as running and return its id, name,
+        arguments and attempts (or None if there is no such job).  The
+        run_at of a running job is the time after which it's considered
+        abandoned.
+        """
+        now = time.time()
+        connection = sqlite3.connect(
+            self.database, timeout=30, isolation_level=None
+        )
+        try:
+            # Lock the database so that no other worker claims the same job
+            connection.execute('BEGIN IMMEDIATE')
+            while True:
+                job = connection.execute(
+                    "SELECT id, name, arguments, status, attempts FROM jobs "
+                    "WHERE status IN ('queued', 'running') AND run_at <= ? "
+                    "ORDER BY run_at, id LIMIT 1",
+                    (now,)
+                ).fetchone()
+                if (
+                    job is None or job[3] == 'queued' or
+                    job[4] < self.max_attempts
+                ):
+                    break
+                connection.execute(
+                    "UPDATE jobs SET status = 'failed', error = ? "
+                    "WHERE id = ?",
+                    ('Abandoned by a worker on the final attempt', job[0])
+                )
+            if job is not None:
+                connection.execute(
+                    "UPDATE jobs SET status = 'running', "
+                    "attempts = attempts + 1, run_at = ? WHERE id = ?",
+                    (now + self.visibility_timeout, job[0])
+                )
+            connection.execute('COMMIT')
+        finally:
+            connection.close()
+
+        if job is None:
+            return None
+        job_id, name, arguments, status, attempts = job
+        return job_id, name, json.loads(arguments), attempts + 1
+
+    def complete(self, job_id):
+        with self.connect() as connection:
+            connection.execute('DELETE FROM jobs WHERE id = ?', (job_id,))
+
+    def fail(self, job_id, attempts, error):
+        with self.connect() as connection:
+            if attempts < self.max_attempts:
+                connection.execute(
+                    "UPDATE jobs SET status = 'queued', error = ?, "
+                    "run_at = ? WHERE id = ?",
+                    (error, time.time() + 10 * 2 ** attempts, job_id)
+                )
+            else:
+                connection.execute(
+                    "UPDATE jobs SET status = 'failed', error = ? "
+                    "WHERE id = ?",
+                    (error, job_id)
+                )
+
+    def work(self, burst=False, interval=1.0):
+        """
+        Run queued jobs one at a time, waiting interval seconds for more
+        whenever the queue is empty (or returning if burst is set).
+        """
+        while True:
+            job = self.claim()
+            if job is None:
+                if burst:
+                    return
+                time.sleep(interval)
+                continue
+
+            job_id, name, (args, kwargs), attempts = job
+            try:
+                self.run(name, args, kwargs)
+            except Exception:
+                self.app.logger.exception('Job %s (%i) failed', name, job_id)
+                self.fail(job_id, attempts, traceback.format_exc())
+            else:
+                self.complete(job_id)
+
+
+BACKENDS = {
+    'immediate': ImmediateBackend,
+    'thread': ThreadBackend,
+    'process': ProcessBackend,
+    'sqlite': SQLiteBackend
+}
+
+
+class JobQueue(object):
+    """
+    Runs registered jobs in the background using the backend named in
+    JOB_QUEUE_BACKEND.  This may be one of the built-in backends or the
+    import path of a BaseBackend subclass.
+    """
+
+    def __init__(self, app=None):
+        self.registry = {}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('JOB_QUEUE_BACKEND', 'thread')
+        app.config.setdefault('JOB_QUEUE_WORKERS', 4)
+        app.config.setdefault('JOB_QUEUE_DATABASE', 'jobs.db')
+        app.config.setdefault('JOB_QUEUE_MAX_ATTEMPTS', 3)
+        app.config.setdefault('JOB_QUEUE_VISIBILITY_TIMEOUT', 3600)
+
+        backend = app.config['JOB_QUEUE_BACKEND']
+        if backend in BACKENDS:
+            backend_class = BACKENDS[backend]
+        else:
+            backend_class = import_string(backend)
+
+        if not hasattr(app, 'extensions'):
+            app.extensions = {}
+        app.extensions['job_queue'] = backend_class(self, app)
+
+    @property
+    def backend(self):
+        return current_app.extensions['job_queue']
+
+    def job(self, func=None, name=None):
+        """
+        Register a function as a job which may be queued using its delay
+        method, for example:
+
+        @queue.job
+        def send_welcome_email(user_id):
+            ...
+
+        send_welcome_email.delay(user.id)
+        """
+        def decorator(func):
+            job = Job(
+                self, func, name or '%s.%s' % (func.__module__, func.__name__)
+            )
+            self.registry[job.name] = job
+            return job
+
+        if func is not None:
+            return decorator(func)
+        return decorator
+
+    def enqueue(self, name, args=(), kwargs=None):
+        return self.backend.enqueue(name, list(args), kwargs or {})
+
+    def run(self, name, args, kwargs):
+        return self.registry[name](*args, **kwargs)
+
+
+class Worker(Command):
+    """Run the jobs stored in the job queue database"""
+
+    option_list = (
+        Option('-b', '--burst', dest='burst', action='store_true',
+               help='Exit once there are no more jobs to run'),
+        Option('-i', '--interval', dest='interval', type=float, default=1.0,
+               help='The number of seconds to wait for new jobs'),
+    )
+
+    def run(self, burst=False, interval=1.0):
+        backend = current_app.extensions['job_queue']
+        if not hasattr(backend, 'work'):
+            print(
+                'The %s backend runs jobs within the application, set '
+                'JOB_QUEUE_BACKEND to sqlite to use a worker' %
+                current_app.config['JOB_QUEUE_BACKEND']
+            )
+            return
+        backend.work(burst, interval)
@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+import json
+import math
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    from urllib.error import HTTPError
+    from urllib.request import urlopen
+except ImportError:
+    # Python 2
+    from urllib2 import HTTPError, urlopen
+
+from flask import current_app
+from flask.ext.script import Command, Option
+
+# The statistics compared against a baseline (and whether higher is better)
+BASELINE_STATISTICS = [
+    ('throughput', True), ('p50', False), ('p95', False), ('p99', False)
+]
+
+
+def percentile(latencies, percent):
+    """Return a percentile of a sorted list using the nearest rank method."""
+    if not latencies:
+        return 0.0
+    rank = int(math.ceil(percent / 100.0 * len(latencies)))
+    return latencies[max(rank - 1, 0)]
+
+
+def summarise(results, elapsed):
+    """
+    Summarise a list of (status, latency) results, with latencies given in
+    milliseconds.
+    """
+    latencies = sorted(latency for status, latency in results)
+    return {
+        'requests': len(results),
+        'failures': len([
+            status for status, latency in results
+            if status is None or status >= 400
+        ]),
+        'throughput': len(results) / elapsed if elapsed else 0.0,
+        'mean': sum(latencies) / len(latencies) if latencies else 0.0,
+        'p50': percentile(latencies, 50),
+        'p95': percentile(latencies, 95),
+        'p99': percentile(latencies, 99),
+        'max': latencies[-1] if latencies else 0.0
+    }
+
+
+class LoadTest(Command):
+    """
+    Send requests to the application from a pool of threads and report the
+    throughput and latency percentiles.  The application is called directly
+    unless the address of a running server is given.  URLs are requested in
+    turn, so a URL given more than once is requested more often.
+    """
+
+    option_list = (
+        Option('urls', nargs='*', default=['/'], help='The URLs to request'),
+        Option('-n', '--requests', dest='requests', type=int, default=1000,
+               help='The total number of requests'),
+        Option('-t', '--concurrency', dest='concurrency', type=int,
+               default=10, help='The number of concurrent requests'),
+        Option('-s', '--server', dest='server',
+               help='The address of a running server '
+                    '(e.g. http://127.0.0.1:8000)'),
+        Option('-o', '--output', dest='output',
+               help='Write the results to a JSON file'),
+        Option('-b', '--baseline', dest='baseline',
+               help='Compare the results with those in a JSON file'),
+    )
+
+    def client(self, server):
+        """Return a function which requests a URL and returns its status."""
+        if server:
+            def request(url):
+                try:
+                    response = urlopen(server.rstrip('/') + url, timeout=30)
+                except HTTPError as e:
+                    return e.code
+                response.read()
+                return response.getcode()
+        else:
+            app = current_app._get_current_object()
+
+            def request(url):
+                response = app.test_client().get(url, buffered=True)
+                response.close()
+                return response.status_code
+        return request
+
+    def run(self, urls, requests=1000, concurrency=10, server=None,
+            output=None, baseline=None):
+        request = self.client(server)
+
+        def timed(url):
+            started = time.time()
+            try:
+                status = request(url)
+            except Exception:
+                status = None
+            return url, status, (time.time() - started) * 1000
+
+        # Request each URL once first so that one-off work (such as building
+        # assets or filling caches) isn't measured
+        for url in set(urls):
+            timed(url)
+
+        sequence = [urls[i % len(urls)] for i in range(requests)]
+        print('Sending %i requests to %s (%i at a time)' % (
+            requests, server or 'the application', concurrency
+        ))
+        executor = ThreadPoolExecutor(concurrency)
+        started = time.time()
+        results = list(executor.map(timed, sequence))
+        elapsed = time.time() - started
+        executor.shutdown()
+
+        report = {
+            'concurrency': concurrency,
+            'overall': summarise(
+                [(status, latency) for url, status, latency in results],
+                elapsed
+            ),
+            'urls': dict(
+                (url, summarise([
+                    (status, latency) for result_url, status, latency
+                    in results if result_url == url
+                ], elapsed))
+                for url in set(urls)
+            )
+        }
+        self.print_report(report)
+
+        if baseline:
+            with open(baseline) as f:
+                self.print_comparison(report, json.load(f))
+        if output:
+            with open(output, 'w') as f:
+                json.dump(report, f, indent=2, sort_keys=True)
+
+    def print_report(self, report):
+        overall = report['overall']
+        print('')
+        print('Requests:   %i (%i failed)' % (
+            overall['requests'], overall['failures']
+        ))
+        print('Throughput: %.1f requests/s' % overall['throughput'])
+        for name, summary in [('Overall', overall)] + sorted(
+            report['urls'].items()
+        ):
+            print(
+                '%s: mean %.1fms, p50 %.1fms, p95 %.1fms, p99 %.1fms, '
+                'max %.1fms' % (
+                    name, summary['mean'], summary['p50'], summary['p95'],
+                    summary['p99'], summary['max']
+                )
+            )
+
+    def print_comparison(self, report, baseline):
+        print('')
+        print('Compared with the baseline:')
+        for name, higher_is_better in BASELINE_STATISTICS:
+            current = report['overall'][name]
+            previous = baseline['overall'][name]
+            change = (current - previous) / previous * 100 if previous else 0
+            regressed = change < 0 if higher_is_better else change > 0
+            print('  %-10s %+.1f%% (%.1f, was %.1f)%s' % (
+                name, change, current, previous,
+                ' regression' if regressed and abs(change) >= 5 else ''
+            ))
@@ -0,0 +1,349 @@
+# -*- coding: utf-8 -*-
+import errno
+import json
+import os
+import tempfile
+import time
+from threading import Lock, Thread
+
+try:
+    import fcntl
+    import resource
+except ImportError:
+    # Windows
+    fcntl = resource = None
+
+from flask import current_app, g, request
+
+# The upper bounds (in seconds) of the request latency histogram buckets
+LATENCY_BUCKETS = [
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+]
+
+# The metrics exposed, each of which is a name, type and description
+METRICS = [
+    ('http_requests_total', 'counter', 'Requests served'),
+    ('http_request_duration_seconds', 'histogram',
+     'Time taken to serve requests'),
+    ('cache_hits_total', 'counter', 'Cache lookups which found a value'),
+    ('cache_misses_total', 'counter', 'Cache lookups which found nothing'),
+    ('cache_hit_ratio', 'gauge', 'Fraction of cache lookups which hit'),
+    ('db_pool_size', 'gauge', 'Connections kept open by the pool'),
+    ('db_pool_checked_out', 'gauge', 'Connections currently in use'),
+    ('db_pool_overflow', 'gauge', 'Connections open beyond the pool size'),
+    ('process_resident_memory_bytes', 'gauge',
+     'Resident memory of each worker process'),
+]
+
+# The file which holds the totals of worker processes which have exited
+ARCHIVE = 'archive.json'
+
+
+def _labels(**labels):
+    return tuple(sorted(labels.items()))
+
+
+def _escape(value):
+    return (
+        str(value).replace('\\', '\\\\').replace('\n', '\\n')
+        .replace('"', '\\"')
+    )
+
+
+def resident_memory():
+    """
+    Return the resident memory of the current process in bytes (or None where
+    it isn't available).
+    """
+    if resource is None:
+        return None
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * resource.getpagesize()
+    except (IOError, IndexError, ValueError):
+        # Only the peak is available (in kilobytes on Linux, bytes on OS X)
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def pid_exists(pid):
+    try:
+        os.kill(pid, 0)
+    except OSError as e:
+        return e.errno == errno.EPERM
+    return True
+
+
+class Counters(object):
+    """
+    The counters of a single worker process, which are kept in memory and
+    updated under a lock (so that each request only costs a few dict
+    updates).  Counters inherited from a parent process are discarded.
+    """
+
+    def __init__(self):
+        self.lock = Lock()
+        self.reset()
+
+    def reset(self):
+        self.pid = os.getpid()
+        self.values = {}
+        self.changed = False
+        self.writer_started = False
+
+    def record(self, endpoint, method, status, duration):
+        with self.lock:
+            if self.pid != os.getpid():
+                self.reset()
+            self.changed = True
+            values = self.values
+            key = ('http_requests_total', _labels(
+                endpoint=endpoint, method=method, status=status
+            ))
+            values[key] = values.get(key, 0) + 1
+
+            for bound in LATENCY_BUCKETS + ['+Inf']:
+                if bound == '+Inf' or duration <= bound:
+                    key = ('http_request_duration_seconds_bucket', _labels(
+                        endpoint=endpoint, le=bound
+                    ))
+                    values[key] = values.get(key, 0) + 1
+            labels = _labels(endpoint=endpoint)
+            key = ('http_request_duration_seconds_sum', labels)
+            values[key] = values.get(key, 0) + duration
+            key = ('http_request_duration_seconds_count', labels)
+            values[key] = values.get(key, 0) + 1
+
+    def copy(self):
+        with self.lock:
+            if self.pid != os.getpid():
+                self.reset()
+            return dict(self.values)
+
+
+class Metrics(object):
+    """
+    Counts and times requests by endpoint and serves them at METRICS_URL
+    along with cache, database pool and memory statistics in the Prometheus
+    text format.
+
+    Each worker process counts its own requests.  When METRICS_DIRECTORY is
+    set, each worker also writes its counters there (every
+    METRICS_WRITE_INTERVAL seconds while it serves requests) so that any
+    worker may report the totals of all of them.  The totals of workers which
+    have exited are kept.
+    """
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('METRICS_URL', '/metrics')
+        app.config.setdefault('METRICS_DIRECTORY', None)
+        app.config.setdefault('METRICS_WRITE_INTERVAL', 1.0)
+
+        if not hasattr(app, 'extensions'):
+            app.extensions = {}
+        app.extensions['metrics'] = Counters()
+
+        if not app.config['METRICS_URL']:
+            return
+        app.before_request(self.before_request)
+        app.after_request(self.after_request)
+        app.teardown_request(self.teardown_request)
+        app.add_url_rule(app.config['METRICS_URL'], 'metrics', self.view)
+
+    @property
+    def counters(self):
+        return current_app.extensions['metrics']
+
+    def before_request(self):
+        g.metrics_start_time = time.time()
+
+    def after_request(self, response):
+        g.metrics_status = response.status_code
+        return response
+
+    def teardown_request(self, exception):
+        start_time = getattr(g, 'metrics_start_time', None)
+        if start_time is None:
+            return
+        counters = self.counters
+        counters.record(
+            request.endpoint or 'none', request.method,
+            getattr(g, 'metrics_status', 500), time.time() - start_time
+        )
+
+        # Threads don't survive forks, so each worker starts its own writer
+        if current_app.config['METRICS_DIRECTORY'] and (
+            not counters.writer_started
+        ):
+            counters.writer_started = True
+            writer = Thread(
+                target=self.write_periodically,
+                args=(current_app._get_current_object(),)
+            )
+            writer.daemon = True
+            writer.start()
+
+    def write_periodically(self, app):
+        counters = app.extensions['metrics']
+        while True:
+            time.sleep(app.config['METRICS_WRITE_INTERVAL'])
+            if counters.changed:
+                with app.app_context():
+                    self.write(app.config['METRICS_DIRECTORY'])
+
+    def snapshot(self):
+        """Return the counters and gauges of the current process."""
+        counters = self.counters.copy()
+        cache = current_app.extensions.get('cache')
+        if cache is not None:
+            counters[('cache_hits_total', ())] = cache.hits
+            counters[('cache_misses_total', ())] = cache.misses
+
+        pid = str(os.getpid())
+        gauges = {}
+        memory = resident_memory()
+        if memory is not None:
+            gauges[('process_resident_memory_bytes', _labels(pid=pid))] = (
+                memory
+            )
+        sqlalchemy = current_app.extensions.get('sqlalchemy')
+        connectors = sqlalchemy.connectors if sqlalchemy is not None else {}
+        for bind, connector in connectors.items():
+            pool = connector.get_engine().pool
+            # Only pools which hold connections (i.e. not SQLite's) have sizes
+            if not hasattr(pool, 'checkedout'):
+                continue
+            labels = _labels(bind=bind or 'default', pid=pid)
+            gauges[('db_pool_size', labels)] = pool.size()
+            gauges[('db_pool_checked_out', labels)] = pool.checkedout()
+            gauges[('db_pool_overflow', labels)] = pool.overflow()
+        return counters, gauges
+
+    def write(self, directory):
+        """Write the current process's snapshot to the directory given."""
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        self.counters.changed = False
+        counters, gauges = self.snapshot()
+        self.write_file(
+            os.path.join(directory, '%i.json' % os.getpid()),
+            counters, gauges
+        )
+
+    def write_file(self, filename, counters, gauges):
+        # Files are replaced in one step so that they're never read half
+        # written
+        handle, temporary = tempfile.mkstemp(dir=os.path.dirname(filename))
+        with os.fdopen(handle, 'w') as f:
+            json.dump({
+                'counters': [list(key) + [value]
+                             for key, value in counters.items()],
+                'gauges': [list(key) + [value]
+                           for key, value in gauges.items()]
+            }, f)
+        os.rename(temporary, filename)
+
+    def read_file(self, filename):
+        with open(filename) as f:
+            data = json.load(f)
+        return tuple(
+            dict(
+                ((name, tuple(tuple(label) for label in labels)), value)
+                for name, labels, value in data[kind]
+            )
+            for kind in ('counters', 'gauges')
+        )
+
+    def collect(self):
+        """Return the counters and gauges of all worker processes."""
+        directory = current_app.config['METRICS_DIRECTORY']
+        if not directory:
+            return self.snapshot()
+
+        self.write(directory)
+        with open(os.path.join(directory, '.lock'), 'w') as lock:
+            # Without fcntl (i.e. on Windows) the files aren't locked
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            archive = os.path.join(directory, ARCHIVE)
+            archived = {}
+            if os.path.exists(archive):
+                archived = self.read_file(archive)[0]
+
+            counters = dict(archived)
+            gauges = {}
+            exited = []
+            for filename in os.listdir(directory):
+                name, extension = os.path.splitext(filename)
+                if extension != '.json' or not name.isdigit():
+                    continue
+                path = os.path.join(directory, filename)
+                process_counters, process_gauges = self.read_file(path)
+                for key, value in process_counters.items():
+                    counters[key] = counters.get(key, 0) + value
+                if pid_exists(int(name)):
+                    gauges.update(process_gauges)
+                else:
+                    # Move the totals of workers which have exited into the
+                    # archive so that they're kept
+                    for key, value in process_counters.items():
+                        archived[key] = archived.get(key, 0) + value
+                    exited.append(path)
+
+            if exited:
+                self.write_file(archive, archived, {})
+                for path in exited:
+                    os.remove(path)
+        return counters, gauges
+
+    def render(self, counters, gauges):
+        """Format metrics in the Prometheus text exposition format."""
+        values = dict(counters)
+        values.update(gauges)
+        hits = counters.get(('cache_hits_total', ()), 0)
+        misses = counters.get(('cache_misses_total', ()), 0)
+        if hits + misses:
+            values[('cache_hit_ratio', ())] = float(hits) / (hits + misses)
+
+        def sort_key(key):
+            name, labels = key
+            return name, [
+                (label, float(value) if label == 'le' else value)
+                for label, value in labels
+            ]
+
+        lines = []
+        for family, kind, description in METRICS:
+            names = [family]
+            if kind == 'histogram':
+                names = [family + suffix
+                         for suffix in ('_bucket', '_sum', '_count')]
+            samples = sorted(
+                (key for key in values if key[0] in names), key=sort_key
+            )
+            if not samples:
+                continue
+            lines.append('# HELP %s %s' % (family, description))
+            lines.append('# TYPE %s %s' % (family, kind))
+            for key in samples:
+                name, labels = key
+                if labels:
+                    name += '{%s}' % ','.join(
+                        '%s="%s"' % (label, _escape(value))
+                        for label, value in labels
+                    )
+                value = values[key]
+                lines.append('%s %s' % (
+                    name, repr(value) if isinstance(value, float) else value
+                ))
+        return '\n'.join(lines) + '\n'
+
+    def view(self):
+        counters, gauges = self.collect()
+        return current_app.response_class(
+            self.render(counters, gauges),
+            mimetype='text/plain; version=0.0.4'
+        )
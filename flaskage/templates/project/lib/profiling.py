@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*-
+import cProfile
+import os
+import pstats
+import random
+import re
+import sys
+import threading
+import time
+
+from flask import current_app, g, request
+from flask.ext.script import Command, Option
+from werkzeug.security import safe_str_cmp
+
+
+class Sampler(threading.Thread):
+    """
+    Records the stack of another thread every interval seconds, counting
+    each distinct stack in the collapsed format used by flame graph tools.
+    """
+
+    def __init__(self, thread_id, interval):
+        super(Sampler, self).__init__()
+        self.daemon = True
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = {}
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.is_set():
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append('%s (%s:%i)' % (
+                    code.co_name, code.co_filename, code.co_firstlineno
+                ))
+                frame = frame.f_back
+            if stack:
+                stack = ';'.join(reversed(stack))
+                self.stacks[stack] = self.stacks.get(stack, 0) + 1
+            time.sleep(self.interval)
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+
+
+class Profiler(object):
+    """
+    Profiles the current thread using cProfile while sampling its stack,
+    saving the results as pstats (.prof) and collapsed stacks (.collapsed).
+    """
+
+    def __init__(self, interval=0.001):
+        self.profile = cProfile.Profile()
+        self.sampler = Sampler(threading.current_thread().ident, interval)
+
+    def start(self):
+        self.sampler.start()
+        self.profile.enable()
+
+    def stop(self):
+        self.profile.disable()
+        self.sampler.stop()
+
+    def save(self, directory, name):
+        """Write the results to the directory given and return their path."""
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        path = os.path.join(directory, re.sub(r'[^\w.-]+', '_', name))
+        self.profile.dump_stats(path + '.prof')
+        with open(path + '.collapsed', 'w') as f:
+            for stack, count in sorted(self.sampler.stacks.items()):
+                f.write('%s %i\n' % (stack, count))
+        return path
+
+
+class RequestProfiler(object):
+    """
+    Profiles requests, writing a profile for each to PROFILING_DIRECTORY.
+    When PROFILING is enabled, requests are profiled at the given sample
+    rate, while any request with an X-Profile header matching
+    PROFILING_SECRET is always profiled.
+    """
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('PROFILING', False)
+        app.config.setdefault('PROFILING_SAMPLE_RATE', 1.0)
+        app.config.setdefault('PROFILING_SECRET', None)
+        app.config.setdefault('PROFILING_INTERVAL', 0.001)
+        app.config.setdefault(
+            'PROFILING_DIRECTORY', os.path.join(app.instance_path, 'profiles')
+        )
+
+        if not app.config['PROFILING'] and not app.config['PROFILING_SECRET']:
+            return
+
+        app.before_request(self.before_request)
+        app.teardown_request(self.teardown_request)
+
+    def profile_request(self):
+        secret = current_app.config['PROFILING_SECRET']
+        header = request.headers.get('X-Profile', '').encode('utf-8')
+        if secret and header and safe_str_cmp(header, secret.encode('utf-8')):
+            return True
+        return (
+            current_app.config['PROFILING'] and
+            random.random() < current_app.config['PROFILING_SAMPLE_RATE']
+        )
+
+    def before_request(self):
+        if self.profile_request():
+            g.profiler = Profiler(current_app.config['PROFILING_INTERVAL'])
+            g.profiler.start()
+
+    def teardown_request(self, exception):
+        profiler = getattr(g, 'profiler', None)
+        if profiler is None:
+            return
+        profiler.stop()
+        profiler.save(
+            current_app.config['PROFILING_DIRECTORY'],
+            '%i-%s-%s' % (time.time() * 1000, request.method, request.path)
+        )
+
+
+class Profile(Command):
+    """
+    Profile a URL by requesting it repeatedly (after one request to warm up)
+    and print the functions which took the most time.  The profile is also
+    saved to PROFILING_DIRECTORY.
+    """
+
+    option_list = (
+        Option('url', help='The URL to profile'),
+        Option('-n', '--requests', dest='requests', type=int, default=10,
+               help='The number of requests to profile'),
+        Option('-s', '--sort', dest='sort', default='cumulative',
+               help='The pstats sort order (e.g. cumulative or tottime)'),
+        Option('-l', '--limit', dest='limit', type=int, default=30,
+               help='The number of functions listed'),
+    )
+
+    def run(self, url, requests=10, sort='cumulative', limit=30):
+        app = current_app._get_current_object()
+        # Only the profiler below should be active while requests are made
+        app.config['PROFILING'] = False
+        app.config['PROFILING_SECRET'] = None
+        client = app.test_client()
+        client.get(url, buffered=True).close()
+
+        profiler = Profiler(app.config['PROFILING_INTERVAL'])
+        profiler.start()
+        for i in range(requests):
+            client.get(url, buffered=True).close()
+        profiler.stop()
+
+        path = profiler.save(
+            app.config['PROFILING_DIRECTORY'],
+            '%i-profile-%s' % (time.time() * 1000, url)
+        )
+        pstats.Stats(path + '.prof').sort_stats(sort).print_stats(limit)
+        print('Profile saved to %s.prof and %s.collapsed' % (path, path))
@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+import sys
+import time
+
+from flask.ext.script import Command, Option
+
+from app import db
+from app.models import BULK_CHUNK_SIZE
+
+
+class Seed(Command):
+    """
+    Fill the database with fake rows for a model using its factory (e.g.
+    ./manage.py db seed User --count 1000000).  Rows are inserted and
+    committed a chunk at a time, so memory use doesn't grow with the count.
+    """
+
+    option_list = (
+        Option('model', help='The name of the model to seed'),
+        Option('-n', '--count', dest='count', type=int, default=1000,
+               help='The number of rows to insert'),
+        Option('-s', '--chunk-size', dest='chunk_size', type=int,
+               default=BULK_CHUNK_SIZE,
+               help='The number of rows inserted in each transaction'),
+    )
+
+    def __init__(self, factories):
+        self.factories = factories
+
+    def create_chunk(self, factory, size):
+        if hasattr(factory, 'create_batch_fast'):
+            factory.create_batch_fast(size)
+        else:
+            factory.create_batch(size)
+            db.session.commit()
+        # Release the objects (if any) held by the session
+        db.session.remove()
+
+    def run(self, model, count=1000, chunk_size=BULK_CHUNK_SIZE):
+        factory = getattr(self.factories, '%sFactory' % model, None)
+        if factory is None:
+            print('No factory named %sFactory could be found in %s' %
+                  (model, self.factories.__name__))
+            return
+
+        started = time.time()
+        seeded = 0
+        while seeded < count:
+            size = min(chunk_size, count - seeded)
+            self.create_chunk(factory, size)
+            seeded += size
+
+            elapsed = time.time() - started
+            sys.stdout.write(
+                '\rSeeded %i of %i %s rows (%i%%, %.0f rows/s)' % (
+                    seeded, count, model, 100 * seeded / count,
+                    seeded / elapsed if elapsed else 0
+                )
+            )
+            sys.stdout.flush()
+        sys.stdout.write('\n')
@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+from flask import current_app
+from flask.ext.script import Command, Option
+from gunicorn.app.base import BaseApplication
+
+from config import server
+
+
+class GunicornApplication(BaseApplication):
+    """Runs a WSGI application using gunicorn with the settings given."""
+
+    def __init__(self, application, settings):
+        self.application = application
+        self.settings = settings
+        super(GunicornApplication, self).__init__()
+
+    def load_config(self):
+        for key, value in self.settings.items():
+            if key in self.cfg.settings and value is not None:
+                self.cfg.set(key, value)
+
+    def load(self):
+        return self.application
+
+
+class Serve(Command):
+    """
+    Serve the application using gunicorn and the settings in
+    config/server.py.  The production application in wsgi.py is served when
+    --production is given, otherwise the application is created using the
+    current configuration.
+    """
+
+    option_list = (
+        Option('-b', '--bind', dest='bind'),
+        Option('-w', '--workers', dest='workers', type=int),
+        Option('-p', '--production', dest='production', action='store_true',
+               help='Serve the production application in wsgi.py'),
+        Option('-a', '--async', dest='async_workers', action='store_true',
+               help='Use async (gevent) workers'),
+    )
+
+    def run(self, bind=None, workers=None, production=False,
+            async_workers=False):
+        settings = dict(
+            (key, value) for key, value in vars(server).items()
+            if not key.startswith('_')
+        )
+        if async_workers:
+            settings['worker_class'] = settings['async_worker_class']
+            settings['workers'] = settings['async_workers']
+            settings['threads'] = 1
+        if bind:
+            settings['bind'] = bind
+        if workers:
+            settings['workers'] = workers
+
+        if production:
+            from wsgi import app
+        else:
+            app = current_app._get_current_object()
+        GunicornApplication(app, settings).run()
@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+import mimetypes
+import os
+import re
+
+from werkzeug.http import parse_accept_header
+from werkzeug.security import safe_join
+from werkzeug.wrappers import Response
+from werkzeug.wsgi import wrap_file
+
+# Precompressed variants of a file in order of preference, which are served
+# to clients that accept the related content encoding
+ENCODINGS = [('br', '.br'), ('gzip', '.gz')]
+
+# Filenames containing a content hash (e.g. application-b34f8f42.css) never
+# change, so they may be cached indefinitely
+FINGERPRINTED = re.compile(r'-[0-9a-f]{8,}\.[^/]+$')
+
+
+class StaticFiles(object):
+    """
+    WSGI middleware which serves files from directory under url_path without
+    passing through Flask.  Precompressed .br and .gz variants created by
+    ./manage.py assets build are served along with the Content-Encoding and
+    Vary headers when the client accepts them, and fingerprinted files are
+    sent with far-future cache headers.
+    """
+
+    def __init__(self, app, directory, url_path='/static', max_age=3600,
+                 fingerprinted_max_age=31536000):
+        self.app = app
+        self.directory = directory
+        self.url_path = url_path.rstrip('/') + '/'
+        self.max_age = max_age
+        self.fingerprinted_max_age = fingerprinted_max_age
+
+    def __call__(self, environ, start_response):
+        path = environ.get('PATH_INFO', '')
+        if (
+            environ['REQUEST_METHOD'] in ('GET', 'HEAD') and
+            path.startswith(self.url_path)
+        ):
+            filename = safe_join(self.directory, path[len(self.url_path):])
+            if filename and os.path.isfile(filename):
+                return self.serve(filename, environ, start_response)
+        return self.app(environ, start_response)
+
+    def find_variant(self, filename, environ):
+        """
+        Return the filename and content encoding of the best precompressed
+        variant of a file accepted by the client.
+        """
+        accepted = parse_accept_header(environ.get('HTTP_ACCEPT_ENCODING'))
+        for encoding, extension in ENCODINGS:
+            if accepted.quality(encoding) and os.path.isfile(
+                filename + extension
+            ):
+                return filename + extension, encoding
+        return filename, None
+
+    def serve(self, filename, environ, start_response):
+        mimetype = mimetypes.guess_type(filename)[0]
+        variant, encoding = self.find_variant(filename, environ)
+        stat = os.stat(variant)
+
+        response = Response(
+            wrap_file(environ, open(variant, 'rb')),
+            mimetype=mimetype or 'application/octet-stream',
+            direct_passthrough=True
+        )
+        response.content_length = stat.st_size
+        response.last_modified = int(stat.st_mtime)
+        response.set_etag('%x-%x-%s' % (
+            int(stat.st_mtime), stat.st_size, encoding or 'identity'
+        ))
+        if encoding:
+            response.content_encoding = encoding
+        if self.has_variants(filename):
+            response.vary.add('Accept-Encoding')
+
+        response.cache_control.public = True
+        if FINGERPRINTED.search(filename):
+            response.cache_control.max_age = self.fingerprinted_max_age
+        else:
+            response.cache_control.max_age = self.max_age
+        return response.make_conditional(environ)(environ, start_response)
+
+    def has_variants(self, filename):
+        return any(
+            os.path.isfile(filename + extension)
+            for encoding, extension in ENCODINGS
+        )
@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+import errno
+import os
+
+from flask import current_app
+from flask.ext.script import Manager
+from jinja2 import FileSystemBytecodeCache
+
+TemplatesCommand = Manager(usage='Perform template operations')
+
+
+def bytecode_cache(directory):
+    """
+    Create a bytecode cache which stores compiled templates in the directory
+    given, creating it if necessary.
+    """
+    try:
+        os.makedirs(directory)
+    except OSError as e:
+        if e.errno != errno.EEXIST:
+            raise
+    return FileSystemBytecodeCache(directory)
+
+
+def compile_templates(app):
+    """
+    Compile all templates of the app (and its blueprints) into its bytecode
+    cache, returning the number of templates compiled.
+    """
+    env = app.jinja_env
+    names = env.list_templates()
+    for name in names:
+        env.get_template(name)
+    return len(names)
+
+
+@TemplatesCommand.command
+def compile():
+    """Compile all templates into the template cache directory"""
+    directory = current_app.config['TEMPLATE_CACHE_DIRECTORY']
+    if not directory:
+        print('TEMPLATE_CACHE_DIRECTORY is not set for this configuration')
+        return
+    current_app.jinja_env.bytecode_cache = bytecode_cache(directory)
+    count = compile_templates(current_app)
+    print('Compiled %i templates into %s' % (count, directory))
+
+
+@TemplatesCommand.command
+def clear():
+    """Remove all compiled templates from the template cache directory"""
+    directory = current_app.config['TEMPLATE_CACHE_DIRECTORY']
+    if directory and os.path.isdir(directory):
+        FileSystemBytecodeCache(directory).clear()
@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+import os
+import subprocess
+import sys
+import tempfile
+from multiprocessing import cpu_count
+
+try:
+    from configparser import RawConfigParser
+except ImportError:
+    # Python 2
+    from ConfigParser import RawConfigParser
+
+from flask import current_app
+from flask.ext.script import Command, Option
+
+# The number of seconds a test process may spend on a single test module
+PROCESS_TIMEOUT = 600
+
+
+def parallel_config(filename):
+    """
+    Copy nose's settings from the config file given without those for
+    coverage (which nose can't measure in other processes) into a temporary
+    file and return its name.
+    """
+    parser = RawConfigParser()
+    parser.read(filename)
+    if not parser.has_section('nosetests'):
+        parser.add_section('nosetests')
+    for option in parser.options('nosetests'):
+        if 'cover' in option:
+            parser.remove_option('nosetests', option)
+
+    handle, config = tempfile.mkstemp(suffix='.cfg')
+    with os.fdopen(handle, 'w') as f:
+        parser.write(f)
+    return config
+
+
+class Test(Command):
+    """
+    Run the tests using nose (passing it any other arguments given).  When
+    --jobs is given, test modules are shared between that many processes,
+    each of which uses its own database.
+    """
+
+    capture_all_args = True
+    option_list = (
+        Option('-j', '--jobs', dest='jobs', type=int, default=1,
+               help='The number of test processes (0 for one per CPU)'),
+    )
+
+    def run(self, args, jobs=1):
+        basedir = os.path.dirname(current_app.root_path)
+        command = [sys.executable, '-m', 'nose']
+        if jobs == 0:
+            jobs = cpu_count()
+        if jobs == 1:
+            sys.exit(subprocess.call(command + args, cwd=basedir))
+
+        config = parallel_config(os.path.join(basedir, 'setup.cfg'))
+        command.extend([
+            '--config=%s' % config,
+            '--processes=%i' % jobs,
+            '--process-timeout=%i' % PROCESS_TIMEOUT
+        ])
+        try:
+            status = subprocess.call(command + args, cwd=basedir)
+        finally:
+            os.remove(config)
+        sys.exit(status)
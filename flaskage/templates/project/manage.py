@@ -6,11 +6,19 @@ from flask.ext.failsafe import failsafe
 from flask.ext.script import Manager
 from flask.ext.script.commands import Clean, Server, Shell, ShowUrls
 from flask.ext.migrate import MigrateCommand
-from flask.ext.assets import ManageAssets
 from factory.alchemy import SQLAlchemyModelFactory
 
-from app import create_app, db, models
+from app import create_app, db, models, queue
+from app import jobs  # noqa (registers all jobs with the queue)
 from config.application import AVAILABLE_CONFIGS, DEFAULT_CONFIG
+from lib.assets import AssetsCommand
+from lib.jobs import Worker
+from lib.loadtest import LoadTest
+from lib.profiling import Profile
+from lib.seed import Seed
+from lib.server import Serve
+from lib.templates import TemplatesCommand
+from lib.testing import Test
 from test import factories
 
 manager = Manager(failsafe(create_app), with_default_commands=False)
@@ -27,16 +35,27 @@ def _make_context():
         factories,
         lambda m: isclass(m) and issubclass(m, SQLAlchemyModelFactory)
     ))
+    # Add jobs to the context
+    context.update(
+        (job.__name__, job) for job in queue.registry.values()
+    )
     return context
 
 manager.add_option('-c', '--config', dest='config',
                    choices=list(AVAILABLE_CONFIGS), default=DEFAULT_CONFIG)
 manager.add_command('clean', Clean())
 manager.add_command('server', Server(host='0.0.0.0'))
+manager.add_command('serve', Serve())
 manager.add_command('shell', Shell(make_context=_make_context))
 manager.add_command('urls', ShowUrls())
+manager.add_command('loadtest', LoadTest())
+manager.add_command('profile', Profile())
+MigrateCommand.add_command('seed', Seed(factories))
 manager.add_command('db', MigrateCommand)
-manager.add_command("assets", ManageAssets())
+manager.add_command('assets', AssetsCommand)
+manager.add_command('templates', TemplatesCommand)
+manager.add_command('test', Test())
+manager.add_command('worker', Worker())
 
 if __name__ == '__main__':
     manager.run()
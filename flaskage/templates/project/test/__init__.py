@@ -1,16 +1,224 @@
 # -*- coding: utf-8 -*-
+import hashlib
+import os
+import shutil
+import tempfile
+from glob import glob
+from inspect import getmembers, isclass
+
+try:
+    import fcntl
+except ImportError:
+    # Windows
+    fcntl = None
+
+from factory.alchemy import SQLAlchemyModelFactory
+from flask.ext.sqlalchemy import SignallingSession
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Connection
+from sqlalchemy.schema import CreateIndex, CreateTable
+
 from app import create_app, db
+from . import factories
+
+app = None
+
+# The session used outside of tests
+application_session = db.session
+
+
+def _configure_sqlite_connection(dbapi_connection, connection_record):
+    dbapi_connection.isolation_level = None
+    # Test databases are thrown away, so there's no need to wait for writes
+    # to reach the disk
+    dbapi_connection.execute('PRAGMA synchronous = OFF')
+
+
+def _begin_sqlite_transaction(connection):
+    connection.execute('BEGIN')
+
+
+def _database_file():
+    url = db.engine.url
+    if url.drivername.startswith('sqlite') and url.database not in (
+        None, '', ':memory:'
+    ):
+        return url.database
+
+
+def _encode(value):
+    value = str(value)
+    return value if isinstance(value, bytes) else value.encode('utf-8')
+
+
+def schema_snapshot(app, directory):
+    """
+    Return an SQLite database holding the schema of all models, which is
+    only built (in the directory given) when the models or migrations
+    change.
+    """
+    tables = db.get_tables_for_bind()
+    dialect = db.engine.dialect
+    digest = hashlib.md5()
+    for table in tables:
+        digest.update(_encode(CreateTable(table).compile(dialect=dialect)))
+        for index in table.indexes:
+            digest.update(
+                _encode(CreateIndex(index).compile(dialect=dialect))
+            )
+    versions = os.path.join(
+        os.path.dirname(app.root_path), 'db', 'migrations', 'versions'
+    )
+    if os.path.isdir(versions):
+        for name in sorted(os.listdir(versions)):
+            digest.update(_encode(name))
+
+    snapshot = os.path.join(directory, 'schema-%s.db' % digest.hexdigest())
+    if os.path.exists(snapshot):
+        return snapshot
+
+    # Only one test process builds the snapshot while the others wait (where
+    # files may be locked)
+    with open(os.path.join(directory, 'schema.lock'), 'w') as lock:
+        if fcntl is not None:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+        if not os.path.exists(snapshot):
+            # Build the snapshot elsewhere first as other test processes
+            # copy it as soon as it exists
+            handle, filename = tempfile.mkstemp(suffix='.db', dir=directory)
+            os.close(handle)
+            engine = create_engine('sqlite:///%s' % filename)
+            db.metadata.create_all(engine, tables=tables)
+            engine.dispose()
+            os.rename(filename, snapshot)
+
+            for stale_snapshot in glob(os.path.join(directory, 'schema-*.db')):
+                if stale_snapshot != snapshot:
+                    try:
+                        os.remove(stale_snapshot)
+                    except OSError:
+                        # Already removed by another test run
+                        pass
+    return snapshot
+
+
+def create_application():
+    """
+    Create the application used by all tests along with its schema.  This
+    only happens once as each test rolls back its changes.
+
+    Each test process uses its own database (as {worker} in the database URI
+    is replaced by the process id) so that tests may run in parallel.  When
+    this is an SQLite file, it starts out as a copy of the schema snapshot
+    rather than being created table by table.
+    """
+    app = create_app('test')
+    app.config['SQLALCHEMY_DATABASE_URI'] = (
+        app.config['SQLALCHEMY_DATABASE_URI'].replace(
+            '{worker}', str(os.getpid())
+        )
+    )
+    app.app_context().push()
+    database = _database_file()
+    if database is not None:
+        # Start afresh in case an earlier run was interrupted
+        drop_database()
+        if not os.path.isdir(os.path.dirname(database)):
+            os.makedirs(os.path.dirname(database))
+        shutil.copyfile(
+            schema_snapshot(app, os.path.dirname(database)), database
+        )
+    if db.engine.name == 'sqlite':
+        # pysqlite only supports SAVEPOINTs when SQLAlchemy begins
+        # transactions itself
+        event.listen(db.engine, 'connect', _configure_sqlite_connection)
+        event.listen(db.engine, 'begin', _begin_sqlite_transaction)
+    event.listen(
+        SignallingSession, 'after_transaction_create', _bind_tables
+    )
+    event.listen(
+        SignallingSession, 'after_transaction_end', _restart_savepoint
+    )
+    if database is None:
+        db.create_all()
+    elif app.config.get('SQLALCHEMY_BINDS'):
+        db.create_all(bind=list(app.config['SQLALCHEMY_BINDS']))
+    return app
+
+
+def _bind_tables(session, transaction):
+    # Flask-SQLAlchemy binds each table to its engine, so the tables of test
+    # sessions must be bound to their connection too
+    if isinstance(session.bind, Connection):
+        for table in db.get_tables_for_bind():
+            session.bind_table(table, session.bind)
+
+
+def _restart_savepoint(session, transaction):
+    if (
+        isinstance(session.bind, Connection) and transaction.nested and
+        not session.transaction.nested
+    ):
+        session.begin_nested()
+
+
+def use_session(session):
+    """Make the models and factories use the scoped session given."""
+    db.session = session
+    for name, factory in getmembers(
+        factories,
+        lambda m: isclass(m) and issubclass(m, SQLAlchemyModelFactory)
+    ):
+        factory.FACTORY_SESSION = session
+
+
+def begin_transaction():
+    """
+    Begin a transaction holding all changes made by a test and replace the
+    session with one bound to it.  Commits made by the test release a
+    SAVEPOINT (which is then restarted) rather than committing the
+    transaction.
+    """
+    connection = db.engine.connect()
+    transaction = connection.begin()
+    use_session(db.create_scoped_session(options={'bind': connection}))
+    db.session.begin_nested()
+    return connection, transaction
+
+
+def end_transaction(connection, transaction):
+    """Roll back all changes made by a test and restore the session."""
+    db.session.remove()
+    use_session(application_session)
+    transaction.rollback()
+    connection.close()
+
+
+def drop_database():
+    """Remove the SQLite database file used by the current test process."""
+    database = _database_file()
+    if database is not None and os.path.exists(database):
+        db.engine.dispose()
+        os.remove(database)
+
+
+def setup_package():
+    global app
+    app = create_application()
+
+
+def teardown_package():
+    drop_database()
 
 
 class BaseTestCase(object):
     def setup(self):
-        self.app = create_app('test')
+        self.app = app
         self.client = self.app.test_client()
         self.ctx = self.app.test_request_context()
         self.ctx.push()
-        db.create_all()
+        self.connection, self.transaction = begin_transaction()
 
     def teardown(self):
-        db.session.remove()
-        db.drop_all()
+        end_transaction(self.connection, self.transaction)
         self.ctx.pop()
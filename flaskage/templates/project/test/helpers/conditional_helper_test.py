@@ -0,0 +1,21 @@
+# -*- coding: utf-8 -*-
+from app.helpers.conditional_helper import render_conditional
+from .. import BaseTestCase
+
+
+class TestHelperConditional(BaseTestCase):
+    def render(self, method):
+        with self.app.test_request_context(
+            '/', method=method, headers={'If-None-Match': '"version"'}
+        ):
+            return render_conditional('welcome/index.html', etag='version')
+
+    def test_not_modified(self):
+        response = self.render('GET')
+        assert response.status_code == 304
+        assert response.data == b''
+
+    def test_not_modified_post(self):
+        response = self.render('POST')
+        assert response.status_code == 200
+        assert b'Flaskage' in response.data
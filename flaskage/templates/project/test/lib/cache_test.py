@@ -0,0 +1,25 @@
+# -*- coding: utf-8 -*-
+from lib.cache import SimpleCache
+
+
+class TestLibraryCache(object):
+    def test_get_set(self):
+        cache = SimpleCache()
+        cache.set('key', 'value')
+        assert cache.get('key') == 'value'
+        assert cache.get('missing') is None
+
+    def test_expiry(self):
+        cache = SimpleCache()
+        cache.set('key', 'value', timeout=-1)
+        assert cache.get('key') is None
+
+    def test_lru_eviction(self):
+        cache = SimpleCache(threshold=2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+        assert cache.get('a') == 1
+        assert cache.get('b') is None
+        assert cache.get('c') == 3
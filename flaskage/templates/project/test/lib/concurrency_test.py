@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+import time
+
+from flask import current_app
+from nose.tools import raises
+from sqlalchemy import literal
+
+from app import concurrency, db
+from .. import BaseTestCase
+
+
+class TestLibraryConcurrency(BaseTestCase):
+    def test_gather(self):
+        assert concurrency.gather(lambda: 1, lambda: 2) == [1, 2]
+
+    def test_gather_concurrently(self):
+        start_time = time.time()
+        concurrency.gather(*[lambda: time.sleep(0.2)] * 3)
+        assert time.time() - start_time < 0.5
+
+    def test_gather_app_context(self):
+        assert concurrency.gather(lambda: current_app.name) == [self.app.name]
+
+    @raises(ValueError)
+    def test_gather_exception(self):
+        def fail():
+            raise ValueError('failed')
+
+        concurrency.gather(lambda: 1, fail)
+
+
+class TestLibraryConcurrencyQueries(object):
+    def teardown(self):
+        db.session.remove()
+
+    def query(self):
+        return db.session(), db.session.execute('SELECT 1').scalar()
+
+    def test_gather_queries(self):
+        (first_session, first), (second_session, second) = (
+            concurrency.gather(self.query, self.query)
+        )
+        assert first == second == 1
+        assert first_session is not second_session
+        assert db.session() not in (first_session, second_session)
+
+    @raises(TypeError)
+    def test_gather_built_query(self):
+        concurrency.gather(db.session.query(literal(1)).all)
@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+import os
+import shutil
+import tempfile
+
+from flask import Flask
+
+from lib.jobs import JobQueue
+
+
+class TestLibraryJobs(object):
+    def setup(self):
+        self.directory = tempfile.mkdtemp()
+        self.queue = JobQueue()
+        self.calls = []
+
+        @self.queue.job
+        def add(a, b):
+            self.calls.append((a, b))
+            return a + b
+        self.add = add
+
+        @self.queue.job(name='fail')
+        def fail():
+            raise ValueError('failed')
+        self.fail = fail
+
+    def teardown(self):
+        shutil.rmtree(self.directory)
+
+    def create_app(self, backend, **config):
+        app = Flask(__name__)
+        app.config.update(config)
+        app.config['JOB_QUEUE_BACKEND'] = backend
+        app.config['JOB_QUEUE_DATABASE'] = os.path.join(
+            self.directory, 'jobs.db'
+        )
+        self.queue.init_app(app)
+        return app
+
+    def test_call(self):
+        assert self.add(1, 2) == 3
+
+    def test_immediate(self):
+        with self.create_app('immediate').app_context():
+            assert self.add.delay(1, 2).result() == 3
+            assert isinstance(self.fail.delay().exception(), ValueError)
+
+    def test_thread(self):
+        with self.create_app('thread').app_context():
+            assert self.add.delay(1, 2).result(timeout=5) == 3
+
+    def test_process(self):
+        app = self.create_app('process')
+        backend = app.extensions['job_queue']
+        assert backend.executor is None
+        with app.app_context():
+            assert self.add.delay(1, 2).result(timeout=5) == 3
+        backend.executor.shutdown()
+        assert backend.executor_pid == os.getpid()
+
+    def test_sqlite(self):
+        app = self.create_app('sqlite')
+        with app.app_context():
+            self.add.delay(1, 2)
+            self.add.delay(3, b=4)
+            assert self.calls == []
+
+            backend = app.extensions['job_queue']
+            backend.work(burst=True)
+            assert self.calls == [(1, 2), (3, 4)]
+            assert backend.claim() is None
+
+    def test_sqlite_retry(self):
+        app = self.create_app('sqlite')
+        with app.app_context():
+            job_id = self.fail.delay()
+            backend = app.extensions['job_queue']
+            backend.work(burst=True)
+
+            # The job is retried later and finally marked as failed
+            with backend.connect() as connection:
+                status, attempts = connection.execute(
+                    'SELECT status, attempts FROM jobs WHERE id = ?',
+                    (job_id,)
+                ).fetchone()
+            assert (status, attempts) == ('queued', 1)
+            backend.fail(job_id, 3, 'failed')
+            with backend.connect() as connection:
+                status, = connection.execute(
+                    'SELECT status FROM jobs WHERE id = ?', (job_id,)
+                ).fetchone()
+            assert status == 'failed'
+
+    def test_sqlite_abandoned(self):
+        app = self.create_app('sqlite', JOB_QUEUE_VISIBILITY_TIMEOUT=0)
+        with app.app_context():
+            job_id = self.add.delay(1, 2)
+            backend = app.extensions['job_queue']
+
+            # Claims made by workers which stopped before finishing the job
+            for attempts in range(1, 4):
+                assert backend.claim()[::3] == (job_id, attempts)
+            assert backend.claim() is None
+            with backend.connect() as connection:
+                status, = connection.execute(
+                    'SELECT status FROM jobs WHERE id = ?', (job_id,)
+                ).fetchone()
+            assert status == 'failed'
+
+    def test_sqlite_running(self):
+        app = self.create_app('sqlite')
+        with app.app_context():
+            self.add.delay(1, 2)
+            backend = app.extensions['job_queue']
+            assert backend.claim() is not None
+            assert backend.claim() is None
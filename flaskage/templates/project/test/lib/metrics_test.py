@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+import os
+import shutil
+import tempfile
+
+from flask import Flask
+
+from lib.cache import Cache
+from lib.metrics import Metrics
+
+
+class TestLibraryMetrics(object):
+    def setup(self):
+        self.directory = tempfile.mkdtemp()
+
+    def teardown(self):
+        shutil.rmtree(self.directory)
+
+    def create_app(self, directory=None):
+        app = Flask(__name__)
+        app.config['CACHE_BACKEND'] = 'simple'
+        app.config['METRICS_DIRECTORY'] = directory
+        self.cache = Cache(app)
+        self.metrics = Metrics(app)
+
+        @app.route('/')
+        def index():
+            if self.cache.get('key') is None:
+                self.cache.set('key', 'value')
+            return 'index'
+
+        return app
+
+    def test_requests(self):
+        client = self.create_app().test_client()
+        client.get('/')
+        client.get('/')
+        client.get('/missing')
+        response = client.get('/metrics')
+        assert response.mimetype == 'text/plain'
+
+        lines = response.get_data(as_text=True).splitlines()
+        assert '# TYPE http_requests_total counter' in lines
+        assert (
+            'http_requests_total{endpoint="index",method="GET",status="200"} 2'
+            in lines
+        )
+        assert (
+            'http_requests_total{endpoint="none",method="GET",status="404"} 1'
+            in lines
+        )
+        assert (
+            'http_request_duration_seconds_bucket{endpoint="index",le="+Inf"}'
+            ' 2' in lines
+        )
+        assert (
+            'http_request_duration_seconds_count{endpoint="index"} 2' in lines
+        )
+        assert 'cache_hits_total 1' in lines
+        assert 'cache_misses_total 1' in lines
+        assert 'cache_hit_ratio 0.5' in lines
+        assert any(
+            line.startswith('process_resident_memory_bytes{pid="%i"}' %
+                            os.getpid())
+            for line in lines
+        )
+
+    def test_workers(self):
+        app = self.create_app(self.directory)
+        client = app.test_client()
+        client.get('/')
+
+        # Another worker which has since exited served two requests
+        with app.app_context():
+            counters, gauges = self.metrics.snapshot()
+            exited_worker = os.path.join(self.directory, '999999999.json')
+            self.metrics.write_file(exited_worker, counters, gauges)
+        client.get('/')
+
+        for i in range(2):
+            lines = client.get('/metrics').get_data(as_text=True).splitlines()
+            assert (
+                'http_requests_total{endpoint="index",method="GET",'
+                'status="200"} 3' in lines
+            )
+            assert len([
+                line for line in lines
+                if line.startswith('process_resident_memory_bytes')
+            ]) == 1
+            assert not os.path.exists(exited_worker)
@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+import gzip
+import os
+import shutil
+import tempfile
+
+from werkzeug.test import Client
+from werkzeug.wrappers import Response
+
+from lib.static import StaticFiles
+
+
+class TestLibraryStatic(object):
+    def setup(self):
+        self.directory = tempfile.mkdtemp()
+        with open(os.path.join(self.directory, 'app-0123abcd.css'), 'wb') as f:
+            f.write(b'body {}')
+        gzip_file = gzip.open(
+            os.path.join(self.directory, 'app-0123abcd.css.gz'), 'wb'
+        )
+        gzip_file.write(b'body {}')
+        gzip_file.close()
+
+        app = StaticFiles(
+            Response('fallback'), self.directory, '/static', max_age=60
+        )
+        self.client = Client(app, Response)
+
+    def teardown(self):
+        shutil.rmtree(self.directory)
+
+    def test_fingerprinted_file(self):
+        response = self.client.get('/static/app-0123abcd.css')
+        assert response.status_code == 200
+        assert response.data == b'body {}'
+        assert response.mimetype == 'text/css'
+        assert response.cache_control.max_age == 31536000
+        assert 'Accept-Encoding' in response.vary
+        assert 'Content-Encoding' not in response.headers
+
+    def test_precompressed_variant(self):
+        response = self.client.get(
+            '/static/app-0123abcd.css',
+            headers=[('Accept-Encoding', 'gzip, deflate')]
+        )
+        assert response.status_code == 200
+        assert response.content_encoding == 'gzip'
+        assert response.mimetype == 'text/css'
+
+    def test_not_modified(self):
+        response = self.client.get('/static/app-0123abcd.css')
+        response = self.client.get(
+            '/static/app-0123abcd.css',
+            headers=[('If-None-Match', response.headers['ETag'])]
+        )
+        assert response.status_code == 304
+
+    def test_fallback(self):
+        response = self.client.get('/static/missing.css')
+        assert response.data == b'fallback'
+        response = self.client.get('/static/../static_test.py')
+        assert response.data == b'fallback'
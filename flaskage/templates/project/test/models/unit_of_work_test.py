@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+from sqlalchemy import event
+
+from app import db
+from app.models import unit_of_work
+from test import BaseTestCase
+
+
+class TestModelUnitOfWork(BaseTestCase):
+    def setup(self):
+        super(TestModelUnitOfWork, self).setup()
+        self.outcomes = []
+        session = db.session()
+        event.listen(session, 'after_commit', self.record_commit)
+        event.listen(session, 'after_soft_rollback', self.record_rollback)
+
+    def record_commit(self, session):
+        self.outcomes.append('commit')
+
+    def record_rollback(self, session, previous_transaction):
+        self.outcomes.append('rollback')
+
+    def test_nested(self):
+        with unit_of_work():
+            with unit_of_work():
+                pass
+            assert self.outcomes == []
+        assert self.outcomes == ['commit']
+
+    def test_nested_failure_caught(self):
+        with unit_of_work():
+            try:
+                with unit_of_work():
+                    raise ValueError()
+            except ValueError:
+                pass
+        assert self.outcomes == ['rollback']
@@ -1,2 +1,10 @@
-from app import create_app
+from app import create_app, warm_up
+from lib.static import StaticFiles
+
 app = create_app('production')
+warm_up(app)
+
+# Serve static files (and their precompressed variants) ahead of Flask
+app.wsgi_app = StaticFiles(
+    app.wsgi_app, app.static_folder, app.static_url_path
+)
@@ -1,5 +1,233 @@
-# from flaskage.cli import cli
+# -*- coding: utf-8 -*-
+from shutil import rmtree
+from tempfile import mkdtemp
+import os
+import logging
 
+from click.testing import CliRunner
 
-class TestCli(object):
-    pass
+from flaskage.cli import cli
+
+
+class TestCli:
+    def setup(self):
+        self.temp_dir = mkdtemp()
+        self.original_dir = os.getcwd()
+        os.chdir(self.temp_dir)
+        self.runner = CliRunner()
+
+    def teardown(self):
+        os.chdir(self.original_dir)
+        rmtree(self.temp_dir)
+
+        # Remove the handlers added by each command run
+        logging.getLogger('flaskage.scaffold').handlers = []
+
+    def invoke(self, *args):
+        return self.runner.invoke(cli, ['--no-color'] + list(args))
+
+    def new_project(self):
+        """Create a project and change into it to generate components."""
+        result = self.invoke('new', 'demo')
+        assert result.exit_code == 0
+        os.chdir('demo')
+
+    def read(self, *path):
+        with open(os.path.join(*path)) as f:
+            return f.read()
+
+    def test_new_database_default(self):
+        result = self.invoke('new', 'demo')
+        assert result.exit_code == 0
+        config = self.read('demo', 'config', 'application.py')
+        assert "'timeout'" in config
+        assert 'SQLALCHEMY_POOL_SIZE' not in config
+        requirements = self.read('demo', 'requirements', 'production.txt')
+        assert 'psycopg2' not in requirements
+        assert 'MySQL-python' not in requirements
+
+    def test_new_database_postgresql(self):
+        result = self.invoke('new', 'demo', '--database', 'postgresql')
+        assert result.exit_code == 0
+        config = self.read('demo', 'config', 'application.py')
+        assert 'SQLALCHEMY_POOL_SIZE' in config
+        assert 'SQLALCHEMY_STATEMENT_TIMEOUT' in config
+        assert "'DATABASE_POOL_RECYCLE', 1800" in config
+        requirements = self.read('demo', 'requirements', 'production.txt')
+        assert 'psycopg2' in requirements
+        assert 'MySQL-python' not in requirements
+
+    def test_new_database_mysql(self):
+        result = self.invoke('new', 'demo', '-d', 'mysql')
+        assert result.exit_code == 0
+        config = self.read('demo', 'config', 'application.py')
+        assert "'DATABASE_POOL_RECYCLE', 3600" in config
+        requirements = self.read('demo', 'requirements', 'production.txt')
+        assert 'MySQL-python' in requirements
+        assert 'psycopg2' not in requirements
+
+    def test_new_database_invalid(self):
+        result = self.invoke('new', 'demo', '--database', 'oracle')
+        assert result.exit_code == 2
+        assert not os.path.exists('demo')
+
+    def test_new_read_replicas(self):
+        result = self.invoke('new', 'demo', '--read-replicas')
+        assert result.exit_code == 0
+        assert 'SQLALCHEMY_REPLICA_URIS' in self.read(
+            'demo', 'config', 'application.py'
+        )
+        database = self.read('demo', 'lib', 'database.py')
+        assert 'class RoutingSession' in database
+        assert 'def create_session' in database
+
+    def test_new_without_read_replicas(self):
+        result = self.invoke('new', 'demo')
+        assert result.exit_code == 0
+        assert 'SQLALCHEMY_REPLICA_URIS' not in self.read(
+            'demo', 'config', 'application.py'
+        )
+        assert 'class RoutingSession' not in self.read(
+            'demo', 'lib', 'database.py'
+        )
+
+    def test_generate_blueprint_cached(self):
+        self.new_project()
+        result = self.invoke('generate', 'blueprint', 'blog', '--cached')
+        assert result.exit_code == 0
+        view = self.read('app', 'views', 'blog_view.py')
+        assert 'from .. import cache' in view
+        assert '@cache.cached()' in view
+
+    def test_generate_blueprint_not_cached(self):
+        self.new_project()
+        result = self.invoke('generate', 'blueprint', 'blog')
+        assert result.exit_code == 0
+        view = self.read('app', 'views', 'blog_view.py')
+        assert 'cache' not in view
+
+    def test_generate_blueprint_conditional(self):
+        self.new_project()
+        result = self.invoke('generate', 'blueprint', 'blog', '--conditional')
+        assert result.exit_code == 0
+        view = self.read('app', 'views', 'blog_view.py')
+        assert (
+            'from ..helpers.conditional_helper import conditional' in view
+        )
+        assert '@conditional' in view
+        assert 'test_index_not_modified' in self.read(
+            'test', 'views', 'blog_view_test.py'
+        )
+
+    def test_generate_blueprint_conditional_and_cached(self):
+        self.new_project()
+        result = self.invoke(
+            'generate', 'blueprint', 'blog', '--conditional', '--cached'
+        )
+        assert result.exit_code == 0
+        # Conditional requests are answered before the cache is consulted
+        view = self.read('app', 'views', 'blog_view.py')
+        assert view.index('@conditional') < view.index('@cache.cached()')
+
+    def test_generate_job(self):
+        self.new_project()
+        result = self.invoke('generate', 'job', 'send_email')
+        assert result.exit_code == 0
+        job = self.read('app', 'jobs', 'send_email_job.py')
+        assert '@queue.job\ndef send_email():' in job
+        assert 'class TestJobSendEmail(BaseTestCase):' in self.read(
+            'test', 'jobs', 'send_email_job_test.py'
+        )
+        assert 'from . import send_email_job  # noqa' in result.output
+
+    def test_generate_job_outside_project(self):
+        result = self.invoke('generate', 'job', 'send_email')
+        assert result.exit_code == 2
+        assert not os.path.exists('app')
+
+    def test_generate_blueprint_paginate(self):
+        self.new_project()
+        result = self.invoke(
+            'generate', 'blueprint', 'blog', '--paginate', 'blog_post'
+        )
+        assert result.exit_code == 0
+        view = self.read('app', 'views', 'blog_view.py')
+        assert 'from ..models import BlogPost' in view
+        assert 'BlogPost.paginate_after(' in view
+        assert 'next_cursor' in self.read(
+            'app', 'templates', 'blog', 'index.html'
+        )
+        assert 'BlogPostFactory.create_batch_fast(25)' in self.read(
+            'test', 'views', 'blog_view_test.py'
+        )
+
+    def test_generate_blueprint_paginate_invalid_model(self):
+        self.new_project()
+        result = self.invoke(
+            'generate', 'blueprint', 'blog', '--paginate', 'Blog-Post'
+        )
+        assert result.exit_code == 2
+        assert not os.path.exists(os.path.join('app', 'views', 'blog_view.py'))
+
+    def test_generate_model_references(self):
+        self.new_project()
+        result = self.invoke(
+            'generate', 'model', 'post', 'author:references:user:required',
+            'editor:references:user:select,unique'
+        )
+        assert result.exit_code == 0
+        model = self.read('app', 'models', 'post.py')
+        assert (
+            "author_id = db.Column(db.Integer, db.ForeignKey('user.id'), "
+            "nullable=False, index=True)" in model
+        )
+        assert (
+            "author = db.relationship('User', foreign_keys=[author_id], "
+            "lazy='joined', innerjoin=True)" in model
+        )
+        assert (
+            "editor_id = db.Column(db.Integer, db.ForeignKey('user.id'), "
+            "unique=True, index=True)" in model
+        )
+        assert (
+            "editor = db.relationship('User', foreign_keys=[editor_id], "
+            "lazy='select')" in model
+        )
+
+        factory = self.read('test', 'factories', 'post_factory.py')
+        assert factory.count('from .user_factory import UserFactory') == 1
+        assert 'author = factory.SubFactory(UserFactory)' in factory
+        assert 'editor = factory.SubFactory(UserFactory)' in factory
+        # Unique references are created for each row
+        assert 'referenced = UserFactory.create_batch(size)' in factory
+        assert 'test_seed_unique_editor' in self.read(
+            'test', 'models', 'post_test.py'
+        )
+
+    def test_generate_model_self_reference(self):
+        self.new_project()
+        result = self.invoke(
+            'generate', 'model', 'category', 'parent:references:category'
+        )
+        assert result.exit_code == 0
+        assert "remote_side='Category.id'" in self.read(
+            'app', 'models', 'category.py'
+        )
+        # A factory creating its own parent would do so endlessly
+        assert 'SubFactory' not in self.read(
+            'test', 'factories', 'category_factory.py'
+        )
+
+    def test_generate_model_invalid_references(self):
+        self.new_project()
+        for column in [
+            'author:references',
+            'author:references:User-Model',
+            'author:references:user:index',
+            'author:references:user:eager',
+            'author:references:user:joined,select'
+        ]:
+            result = self.invoke('generate', 'model', 'post', column)
+            assert result.exit_code == 2, column
+            assert 'column author' in result.output, column
+        assert not os.path.exists(os.path.join('app', 'models', 'post.py'))